@@ -0,0 +1,38 @@
+"""add dashboard metric
+
+Revision ID: 0a8c4e6f1b92
+Revises: b3f6d2e8a417
+Create Date: 2026-10-18 18:10:26.742915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a8c4e6f1b92'
+down_revision: Union[str, None] = 'b3f6d2e8a417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # main.py's create_all may already have created the table.
+    # It is left empty here: the first dashboard read rebuilds it from the source tables.
+    if sa.inspect(op.get_bind()).has_table('dashboard_metric'):
+        return
+    op.create_table(
+        'dashboard_metric',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('value', sa.Float(precision=53), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('dashboard_metric')
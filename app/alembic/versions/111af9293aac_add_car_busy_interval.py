@@ -0,0 +1,59 @@
+"""add car busy interval
+
+Revision ID: 111af9293aac
+Revises: cfe234aad247
+Create Date: 2026-10-18 10:03:17.220815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '111af9293aac'
+down_revision: Union[str, None] = 'cfe234aad247'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # main.py's create_all may already have created the table
+    if not sa.inspect(op.get_bind()).has_table('car_busy_interval'):
+        op.create_table(
+            'car_busy_interval',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('car_id', sa.Integer(), nullable=False),
+            sa.Column('booking_id', sa.Integer(), nullable=True),
+            sa.Column('start_datetime', sa.DateTime(), nullable=False),
+            sa.Column('end_datetime', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['booking_id'], ['booking.id']),
+            sa.ForeignKeyConstraint(['car_id'], ['car.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(
+            'ix_car_busy_interval_car_window',
+            'car_busy_interval',
+            ['car_id', 'start_datetime', 'end_datetime'],
+            unique=False,
+        )
+
+    # Seed intervals from bookings that still hold the car
+    op.execute(
+        """
+        INSERT INTO car_busy_interval (car_id, booking_id, start_datetime, end_datetime, created_at)
+        SELECT b.car_id, b.id, b.start_datetime, b.end_datetime, NOW()
+        FROM booking b
+        WHERE b.status IN ('booked', 'picked')
+          AND NOT EXISTS (SELECT 1 FROM car_busy_interval i WHERE i.booking_id = b.id)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_car_busy_interval_car_window', table_name='car_busy_interval')
+    op.drop_table('car_busy_interval')
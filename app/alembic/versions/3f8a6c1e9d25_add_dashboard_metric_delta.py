@@ -0,0 +1,38 @@
+"""add dashboard metric delta
+
+Revision ID: 3f8a6c1e9d25
+Revises: 6b1d9e4f2a73
+Create Date: 2026-10-18 21:38:52.907163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a6c1e9d25'
+down_revision: Union[str, None] = '6b1d9e4f2a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # main.py's create_all may already have created the table
+    if sa.inspect(op.get_bind()).has_table('dashboard_metric_delta'):
+        return
+    op.create_table(
+        'dashboard_metric_delta',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('value', sa.Float(precision=53), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('dashboard_metric_delta')
@@ -0,0 +1,28 @@
+"""add car updated_at index
+
+Revision ID: 4d7a1c9e2b60
+Revises: f2b9d4c7e815
+Create Date: 2026-10-18 20:05:43.118902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d7a1c9e2b60'
+down_revision: Union[str, None] = 'f2b9d4c7e815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_car_updated_at', 'car', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_car_updated_at', table_name='car')
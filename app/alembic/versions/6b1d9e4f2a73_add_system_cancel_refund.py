@@ -0,0 +1,38 @@
+"""add system cancel refund
+
+Revision ID: 6b1d9e4f2a73
+Revises: 8e3f5a2d7c14
+Create Date: 2026-10-18 21:05:47.219830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1d9e4f2a73'
+down_revision: Union[str, None] = '8e3f5a2d7c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REFUND_REASONS = ('cancelled_by_user', 'refundable', 'cancelled_by_owner')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('refund', 'reason',
+                    existing_type=sa.Enum(*REFUND_REASONS),
+                    type_=sa.Enum(*REFUND_REASONS, 'cancelled_by_system'),
+                    existing_nullable=False)
+    op.add_column('scheduler_lease', sa.Column('watermark', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('scheduler_lease', 'watermark')
+    op.alter_column('refund', 'reason',
+                    existing_type=sa.Enum(*REFUND_REASONS, 'cancelled_by_system'),
+                    type_=sa.Enum(*REFUND_REASONS),
+                    existing_nullable=False)
@@ -0,0 +1,44 @@
+"""add booking scheduler
+
+Revision ID: 7d9f0c2ab813
+Revises: e41b7a9c3f26
+Create Date: 2026-10-18 16:21:35.480927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d9f0c2ab813'
+down_revision: Union[str, None] = 'e41b7a9c3f26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('booking', sa.Column('overdue_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_booking_status_start', 'booking', ['status', 'start_datetime'], unique=False)
+    op.create_index('ix_booking_status_end', 'booking', ['status', 'end_datetime'], unique=False)
+
+    # main.py's create_all may already have created the table
+    if not sa.inspect(op.get_bind()).has_table('scheduler_lease'):
+        op.create_table(
+            'scheduler_lease',
+            sa.Column('name', sa.String(length=64), nullable=False),
+            sa.Column('holder', sa.String(length=128), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('scheduler_lease')
+    op.drop_index('ix_booking_status_end', table_name='booking')
+    op.drop_index('ix_booking_status_start', table_name='booking')
+    op.drop_column('booking', 'overdue_at')
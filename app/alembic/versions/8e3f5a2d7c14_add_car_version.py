@@ -0,0 +1,28 @@
+"""add car version
+
+Revision ID: 8e3f5a2d7c14
+Revises: 4d7a1c9e2b60
+Create Date: 2026-10-18 20:31:12.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3f5a2d7c14'
+down_revision: Union[str, None] = '4d7a1c9e2b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('car', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('car', 'version')
@@ -0,0 +1,30 @@
+"""add car search indexes
+
+Revision ID: 9aa216d18c40
+Revises: 111af9293aac
+Create Date: 2026-10-18 11:26:54.118309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9aa216d18c40'
+down_revision: Union[str, None] = '111af9293aac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_car_search_geo', 'car', ['is_visible', 'verification_status', 'geohash'], unique=False)
+    op.create_index('ix_car_search_filters', 'car', ['is_visible', 'verification_status', 'car_type', 'fuel_type'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_car_search_filters', table_name='car')
+    op.drop_index('ix_car_search_geo', table_name='car')
@@ -0,0 +1,39 @@
+"""add daily rollup delta
+
+Revision ID: a2c7e5b8d316
+Revises: 3f8a6c1e9d25
+Create Date: 2026-10-18 22:14:06.538120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2c7e5b8d316'
+down_revision: Union[str, None] = '3f8a6c1e9d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # main.py's create_all may already have created the table
+    if sa.inspect(op.get_bind()).has_table('daily_rollup_delta'):
+        return
+    op.create_table(
+        'daily_rollup_delta',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('metric', sa.String(length=64), nullable=False),
+        sa.Column('value', sa.Float(precision=53), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_rollup_delta')
@@ -0,0 +1,46 @@
+"""add webhook event
+
+Revision ID: b3f6d2e8a417
+Revises: 7d9f0c2ab813
+Create Date: 2026-10-18 17:02:51.336470
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f6d2e8a417'
+down_revision: Union[str, None] = '7d9f0c2ab813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # main.py's create_all may already have created the table
+    if sa.inspect(op.get_bind()).has_table('webhook_event'):
+        return
+    op.create_table(
+        'webhook_event',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(length=32), nullable=False),
+        sa.Column('event_id', sa.String(length=64), nullable=True),
+        sa.Column('event', sa.String(length=64), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.Enum('pending', 'processed', 'failed'), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('event_id'),
+    )
+    op.create_index('ix_webhook_event_queue', 'webhook_event', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webhook_event_queue', table_name='webhook_event')
+    op.drop_table('webhook_event')
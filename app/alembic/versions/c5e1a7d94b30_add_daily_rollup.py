@@ -0,0 +1,65 @@
+"""add daily rollup
+
+Revision ID: c5e1a7d94b30
+Revises: 0a8c4e6f1b92
+Create Date: 2026-10-18 19:04:12.658204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e1a7d94b30'
+down_revision: Union[str, None] = '0a8c4e6f1b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (metric, aggregate, table, extra condition)
+BACKFILL = [
+    ('users.new', 'COUNT(*)', 'user', "user_type IN ('user', 'owner')"),
+    ('bookings.count', 'COUNT(*)', 'booking', None),
+    ('bookings.hours', 'SUM(total_hours)', 'booking', None),
+    ('bookings.amount', 'SUM(total_hours * price_per_hour - total_hours * price_per_hour * COALESCE(coupon_discount, 0) / 100 + COALESCE(late_charge, 0))', 'booking', None),
+    ('payments.amount', 'SUM(total_hours * price_per_hour - total_hours * price_per_hour * COALESCE(coupon_discount, 0) / 100)', 'payment', None),
+    ('refunds.count', 'COUNT(*)', 'refund', None),
+    ('refunds.amount', 'SUM(refund_amount)', 'refund', None),
+    ('penalties.amount', 'SUM(penalty_amount)', 'penalty', None),
+    ('payouts.amount', 'SUM(payout_amount)', 'payout', None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # main.py's create_all may already have created the table
+    if not sa.inspect(op.get_bind()).has_table('daily_rollup'):
+        op.create_table(
+            'daily_rollup',
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('metric', sa.String(length=64), nullable=False),
+            sa.Column('value', sa.Float(precision=53), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('day', 'metric'),
+        )
+
+    # Rebuild from history; replaces any partial rows written before this ran
+    op.execute("DELETE FROM daily_rollup")
+    for metric, aggregate, table, condition in BACKFILL:
+        where = f"WHERE created_at IS NOT NULL AND {condition}" if condition else "WHERE created_at IS NOT NULL"
+        op.execute(
+            f"""
+            INSERT INTO daily_rollup (day, metric, value, updated_at)
+            SELECT DATE(created_at), '{metric}', COALESCE({aggregate}, 0), NOW()
+            FROM `{table}`
+            {where}
+            GROUP BY DATE(created_at)
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_rollup')
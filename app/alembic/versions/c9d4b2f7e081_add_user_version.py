@@ -0,0 +1,28 @@
+"""add user version
+
+Revision ID: c9d4b2f7e081
+Revises: a2c7e5b8d316
+Create Date: 2026-10-18 22:41:30.172945
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d4b2f7e081'
+down_revision: Union[str, None] = 'a2c7e5b8d316'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'version')
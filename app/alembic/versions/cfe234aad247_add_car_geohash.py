@@ -0,0 +1,41 @@
+"""add car geohash
+
+Revision ID: cfe234aad247
+Revises:
+Create Date: 2026-10-18 09:12:41.503127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.geo import encode_geohash
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cfe234aad247'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('car', sa.Column('geohash', sa.String(length=12), nullable=True))
+    op.create_index(op.f('ix_car_geohash'), 'car', ['geohash'], unique=False)
+
+    # Backfill existing listings so they show up in prefix searches
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, latitude, longitude FROM car")).fetchall()
+    if rows:
+        bind.execute(
+            sa.text("UPDATE car SET geohash = :geohash WHERE id = :id"),
+            [{"id": row.id, "geohash": encode_geohash(row.latitude, row.longitude)} for row in rows],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_car_geohash'), table_name='car')
+    op.drop_column('car', 'geohash')
@@ -0,0 +1,30 @@
+"""add booking history indexes
+
+Revision ID: e41b7a9c3f26
+Revises: 5c2e8b71d0a4
+Create Date: 2026-10-18 15:07:44.903116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b7a9c3f26'
+down_revision: Union[str, None] = '5c2e8b71d0a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_booking_user_history', 'booking', ['user_id', 'status', 'start_datetime'], unique=False)
+    op.create_index('ix_booking_owner_history', 'booking', ['car_owner_id', 'status', 'start_datetime'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booking_owner_history', table_name='booking')
+    op.drop_index('ix_booking_user_history', table_name='booking')
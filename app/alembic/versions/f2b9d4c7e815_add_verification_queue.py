@@ -0,0 +1,36 @@
+"""add verification queue
+
+Revision ID: f2b9d4c7e815
+Revises: c5e1a7d94b30
+Create Date: 2026-10-18 18:42:09.316284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b9d4c7e815'
+down_revision: Union[str, None] = 'c5e1a7d94b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('user_verification', 'car_verification'):
+        op.add_column(table, sa.Column('claimed_by', sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+        op.create_foreign_key(f'fk_{table}_claimed_by', table, 'user', ['claimed_by'], ['id'])
+        op.create_index(f'ix_{table}_status_created', table, ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('car_verification', 'user_verification'):
+        op.drop_index(f'ix_{table}_status_created', table_name=table)
+        op.drop_constraint(f'fk_{table}_claimed_by', table, type_='foreignkey')
+        op.drop_column(table, 'lease_expires_at')
+        op.drop_column(table, 'claimed_by')
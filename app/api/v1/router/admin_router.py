@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from datetime import datetime, timedelta
+from sqlalchemy import func
+from datetime import date, datetime, timedelta
+from typing import Literal, Optional
 from models.payout_model import Payout
 from database import get_db
 from models.user_model import User
@@ -14,74 +15,64 @@ from models.coupon_model import Coupon
 from models.car_review_model import CarReview
 from models.system_review_model import SystemReview
 from models.otp_model import Otp
+from utils.car_catalog import car_catalog
+from utils.booking_scheduler import booking_scheduler
+from utils.dashboard_summary import read_summary, rebuild_summary
+from utils.swr_cache import StaleWhileRevalidateCache
+from utils.daily_rollup import query_rollups, rebuild_rollups, ROLLUP_METRICS
+from utils.export import status_values, parquet_available, stream_export
+from config import DASHBOARD_CACHE_TTL_SECONDS
+from utils.settlement import settle_batch
+from utils.search_cache import invalidate_car
+from schemas.booking_schema import SettlementBatchRequest, SettlementBatchResponse
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+MAX_ANALYTICS_DAYS = 1100
 
-@router.post("/")
-def get_dashboard_data(db: Session = Depends(get_db)):
-    # USERS
-    total_users = db.query(User).count()
-    total_verified_users = db.query(User).filter(User.verification_status == 'approved', User.user_type == 'user').count()
-    total_owners = db.query(User).filter(User.user_type == 'owner').count()
-    total_employees = db.query(User).filter(User.user_type == 'employee').count()
+
+def compute_dashboard_data(db: Session):
+    # USERS (one grouped query)
+    user_counts = db.query(User.user_type, User.verification_status, func.count(User.id)).group_by(User.user_type, User.verification_status).all()
+    total_users = sum(count for _, _, count in user_counts)
+    total_verified_users = sum(count for user_type, status, count in user_counts if user_type == 'user' and status == 'approved')
+    total_owners = sum(count for user_type, _, count in user_counts if user_type == 'owner')
+    total_employees = sum(count for user_type, _, count in user_counts if user_type == 'employee')
 
     # USER GROWTH (Last 6 months) - count both users and owners as "users"
     six_months_ago = datetime.utcnow() - timedelta(days=180)
-    user_growth = (
-        db.query(
-            extract('year', User.created_at).label('year'),
-            extract('month', User.created_at).label('month'),
-            func.count(User.id)
-        )
-        .filter(User.created_at >= six_months_ago, User.user_type.in_(['user', 'owner']))
-        .group_by('year', 'month')
-        .order_by('year', 'month')
-        .all()
-    )
+    user_growth = query_rollups(db, six_months_ago.date(), datetime.utcnow().date(), "month", ("users.new",))
     user_growth_data = [
-        {"month": f"{int(y)}-{int(m):02d}", "count": c} for y, m, c in user_growth
+        {"month": row["period"].strftime("%Y-%m"), "count": int(row["users.new"])} for row in user_growth if row["users.new"]
     ]
 
-    # CARS
-    total_cars = db.query(Car).count()
-    verified_cars = db.query(Car).filter(Car.verification_status == 'approved').count()
-
-    cars_by_fuel_type = dict(
-        db.query(Car.fuel_type, func.count(Car.id)).group_by(Car.fuel_type).all()
-    )
-    cars_by_transmission = dict(
-        db.query(Car.transmission_type, func.count(Car.id)).group_by(Car.transmission_type).all()
-    )
-    cars_by_type = dict(
-        db.query(Car.car_type, func.count(Car.id)).group_by(Car.car_type).all()
-    )
-
-    # BOOKINGS
-    total_bookings = db.query(Booking).count()
-
-    booking_status_counts = dict(
-        db.query(Booking.status, func.count(Booking.id)).group_by(Booking.status).all()
-    )
-
-    total_booking_time = db.query(func.sum(Booking.total_hours)).scalar() or 0
-    average_booking_time = db.query(func.avg(Booking.total_hours)).scalar() or 0
-
-    total_booking_amount = db.query(
-        func.sum(
-            (Booking.total_hours * Booking.price_per_hour) - 
-            ((Booking.total_hours * Booking.price_per_hour * Booking.coupon_discount) / 100) + 
-            Booking.late_charge
-        )
-    ).scalar() or 0
-
-    average_booking_amount = db.query(
-        func.avg(
-            (Booking.total_hours * Booking.price_per_hour) - 
-            ((Booking.total_hours * Booking.price_per_hour * Booking.coupon_discount) / 100) + 
-            Booking.late_charge
-        )
-    ).scalar() or 0
+    # CARS (one grouped query, split per dimension here)
+    car_groups = db.query(
+        Car.fuel_type, Car.transmission_type, Car.car_type, Car.verification_status, func.count(Car.id)
+    ).group_by(Car.fuel_type, Car.transmission_type, Car.car_type, Car.verification_status).all()
+    total_cars = 0
+    verified_cars = 0
+    cars_by_fuel_type, cars_by_transmission, cars_by_type = {}, {}, {}
+    for fuel_type, transmission_type, car_type, status, count in car_groups:
+        total_cars += count
+        if status == 'approved':
+            verified_cars += count
+        cars_by_fuel_type[fuel_type] = cars_by_fuel_type.get(fuel_type, 0) + count
+        cars_by_transmission[transmission_type] = cars_by_transmission.get(transmission_type, 0) + count
+        cars_by_type[car_type] = cars_by_type.get(car_type, 0) + count
+
+    # BOOKINGS and FINANCIALS come from the incrementally maintained summary
+    summary = read_summary(db)
+    total_bookings = int(summary.get("bookings.count", 0))
+    booking_status_counts = {
+        key[len("bookings.status."):]: int(value)
+        for key, value in summary.items()
+        if key.startswith("bookings.status.") and value
+    }
+    total_booking_time = summary.get("bookings.hours", 0)
+    total_booking_amount = summary.get("bookings.amount", 0)
+    average_booking_time = total_booking_time / total_bookings if total_bookings else 0
+    average_booking_amount = total_booking_amount / total_bookings if total_bookings else 0
 
     # REVIEWS
     rating_counts = dict(
@@ -97,23 +88,6 @@ def get_dashboard_data(db: Session = Depends(get_db)):
         "one_star": rating_counts.get(1, 0),
     }
 
-    # FINANCIALS
-    total_transaction_amount = db.query(
-        func.sum(
-            (Payment.total_hours * Payment.price_per_hour) - 
-            ((Payment.total_hours * Payment.price_per_hour * Payment.coupon_discount) / 100) 
-            
-        )
-    ).scalar() or 0
-
-    refunded_amount = db.query(func.sum(Refund.refund_amount)).scalar() or 0
-    penalty_amount = db.query(func.sum(Penalty.penalty_amount)).scalar() or 0
-
-    payouts = db.query(Payout).all()
-    total_payout = sum(payout.payout_amount for payout in payouts)
-
-    coupons_given = db.query(Coupon).count()
-
     # FINAL DATA
     return {
         "users": {
@@ -140,10 +114,100 @@ def get_dashboard_data(db: Session = Depends(get_db)):
         },
         "reviews": reviews,
         "financials": {
-            "total_transaction_amount": total_transaction_amount,
-            "refunded_amount": refunded_amount,
-            "penalty_amount": penalty_amount,
-            "coupons_given": coupons_given,
-            "total_payout": total_payout
+            "total_transaction_amount": summary.get("payments.amount", 0),
+            "refunded_amount": summary.get("refunds.amount", 0),
+            "penalty_amount": summary.get("penalties.amount", 0),
+            "coupons_given": int(summary.get("coupons.count", 0)),
+            "total_payout": summary.get("payouts.amount", 0)
         }
     }
+
+
+dashboard_cache = StaleWhileRevalidateCache(compute_dashboard_data, DASHBOARD_CACHE_TTL_SECONDS, "dashboard-cache")
+
+
+@router.post("/")
+def get_dashboard_data():
+    # Never blocks on the aggregates once warm: a stale payload is served while one background refresh runs
+    data, cache = dashboard_cache.get()
+    return {**data, "cache": cache}
+
+
+@router.post("/dashboard-summary/rebuild")
+def rebuild_dashboard_summary(db: Session = Depends(get_db)):
+    return rebuild_summary(db)
+
+
+@router.get("/analytics")
+def get_analytics(
+    start: date,
+    end: date,
+    granularity: Literal['day', 'week', 'month'] = 'day',
+    metrics: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days > MAX_ANALYTICS_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_ANALYTICS_DAYS} days")
+
+    selected = tuple(metrics.split(",")) if metrics else ROLLUP_METRICS
+    unknown = [metric for metric in selected if metric not in ROLLUP_METRICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown metrics: {', '.join(unknown)}")
+
+    return {
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "series": query_rollups(db, start, end, granularity, selected),
+    }
+
+
+@router.post("/analytics/rebuild")
+def rebuild_analytics(start: date, end: date, db: Session = Depends(get_db)):
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    return {"rows": rebuild_rollups(db, start, end)}
+
+
+@router.get("/exports/{table}")
+def export_table(
+    table: Literal['booking', 'payment', 'refund', 'penalty', 'payout'],
+    format: Literal['csv', 'parquet'] = 'csv',
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[str] = None,
+):
+    # start is inclusive and end exclusive, both on created_at
+    if start and end and end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if status is not None and status not in status_values(table):
+        raise HTTPException(status_code=400, detail=f"Invalid status for {table}: {status}")
+    if format == 'parquet' and not parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export needs the pyarrow package")
+    return stream_export(table, format, start, end, status)
+
+
+@router.get("/car-catalog")
+def get_car_catalog_metrics():
+    return car_catalog.metrics()
+
+
+@router.get("/booking-scheduler")
+def get_booking_scheduler_metrics():
+    return booking_scheduler.metrics()
+
+
+@router.post("/settlements", response_model=SettlementBatchResponse)
+def settle_bookings(payload: SettlementBatchRequest, db: Session = Depends(get_db)):
+    results, cars = settle_batch(db, payload.items)
+    for car in cars:
+        invalidate_car(car)
+
+    settled = sum(1 for result in results if result["status"] == "settled")
+    return {
+        "results": results,
+        "settled": settled,
+        "failed": len(results) - settled,
+    }
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_
 from models.payout_model import Payout
 from models.booking_model import Booking
 from models.payment_model import Payment
@@ -7,17 +9,21 @@ from models.coupon_model import Coupon
 from models.refund_model import Refund
 from models.penalty_model import Penalty
 from database import get_db
-from schemas.booking_schema import RazorpayOrderRequest,PaymentVerificationRequest, BookingCancellation, BookingRequest, MyBookingOut, MyCarBookingOut, PickupConfirmation, DropConfirmation, BookingCancellationByOwner
+from schemas.booking_schema import RazorpayOrderRequest,PaymentVerificationRequest, BookingCancellation, BookingRequest, MyBookingOut, MyCarBookingOut, PickupConfirmation, DropConfirmation, BookingCancellationByOwner, QuoteRequest, QuoteResponse, BookingCarSummary
 from datetime import datetime, timedelta
+from typing import Optional, Literal
 from models.car_model import Car
+from utils.availability import load_interval_tree, reserve_interval, busy_car_ids
+from utils.settlement import load_settlement_rows, compute_settlement, apply_settlement, SETTLED_STATUSES
+from utils.search_cache import invalidate_car
+from utils.streaming import wants_ndjson, stream_query
+from utils.pagination import encode_cursor, decode_cursor
+from utils.payment_gateway import razorpay_gateway, verify_signature, PaymentGatewayError
+from utils.idempotency import run_idempotent
+from utils.pricing import quote_booking, quote_matrix, booking_hours, late_fee_schedule, amount_in_paise
+from config import SECURITY_DEPOSIT
+from functools import partial
 import random
-import os
-import razorpay
-import hmac
-import hashlib
-from dotenv import load_dotenv
-
-load_dotenv()
 
 router = APIRouter(prefix="/booking", tags=["Booking"])
 
@@ -25,22 +31,87 @@ router = APIRouter(prefix="/booking", tags=["Booking"])
 def generate_otp():
     return str(random.randint(1000, 9999))
 
-RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
-RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
+# Status filter for the booking history endpoints
+HISTORY_STATUSES = {
+    "upcoming": ("booked",),
+    "active": ("picked",),
+    "past": ("completed", "cancelled_by_user", "cancelled_by_owner", "cancelled_by_system"),
+}
+
+BOOKING_CAR_COLUMNS = tuple(getattr(Car, field) for field in BookingCarSummary.model_fields)
+
+
+def _history_keys(status):
+    # Upcoming trips read soonest first, everything else most recent first
+    descending = status != "upcoming"
+    return ((Booking.start_datetime, descending), (Booking.id, descending))
+
+
+def _history_query(db: Session, owner_column, user_id, status):
+    query = db.query(Booking).filter(owner_column == user_id)
+    if status:
+        query = query.filter(Booking.status.in_(HISTORY_STATUSES[status]))
+    return query.order_by(*[column.desc() if descending else column.asc() for column, descending in _history_keys(status)])
+
+
+def _history_page(db: Session, owner_column, user_id, status, limit, cursor, schema, response: Response):
+    query = _history_query(db, owner_column, user_id, status)
+
+    if cursor:
+        after = decode_cursor(cursor)
+        if after.get("status") != status or "start" not in after or "id" not in after:
+            raise HTTPException(status_code=400, detail="Cursor does not match this request")
+        try:
+            last_start = datetime.fromisoformat(after["start"])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        last_id = after["id"]
+        if status == "upcoming":
+            query = query.filter(or_(Booking.start_datetime > last_start, and_(Booking.start_datetime == last_start, Booking.id > last_id)))
+        else:
+            query = query.filter(or_(Booking.start_datetime < last_start, and_(Booking.start_datetime == last_start, Booking.id < last_id)))
+
+    # Car summary comes from the same query instead of one /car-details call per booking
+    rows = query.join(Car, Car.id == Booking.car_id).add_columns(*BOOKING_CAR_COLUMNS).limit(limit + 1).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        response.headers["X-Next-Cursor"] = encode_cursor({"status": status, "start": last.start_datetime.isoformat(), "id": last.id})
+
+    items = []
+    for booking, *car in rows:
+        item = schema.model_validate(booking, from_attributes=True)
+        item.car = BookingCarSummary(**dict(zip(BookingCarSummary.model_fields, car)))
+        items.append(item)
+    return items
 
-razorpay_client = razorpay.Client(
-    auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET)
-)
 
 @router.get("/my-bookings/{user_id}", response_model=list[MyBookingOut])
-def get_bookings_by_user(user_id: int, db: Session = Depends(get_db)):
-    bookings = db.query(Booking).filter(Booking.user_id == user_id).all()
-    return bookings
+def get_bookings_by_user(
+    user_id: int,
+    response: Response,
+    status: Optional[Literal['upcoming', 'active', 'past']] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    return _history_page(db, Booking.user_id, user_id, status, limit, cursor, MyBookingOut, response)
 
 @router.get("/my-car-bookings/{user_id}", response_model=list[MyCarBookingOut])
-def get_my_car_bookings(user_id: int, db: Session = Depends(get_db)):
-    bookings = db.query(Booking).filter(Booking.car_owner_id == user_id).all()
-    return bookings
+def get_my_car_bookings(
+    user_id: int,
+    request: Request,
+    response: Response,
+    status: Optional[Literal['upcoming', 'active', 'past']] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    if wants_ndjson(request):
+        # Full export, unpaginated
+        return stream_query(lambda stream_db: _history_query(stream_db, Booking.car_owner_id, user_id, status), MyCarBookingOut, _history_keys(status))
+    return _history_page(db, Booking.car_owner_id, user_id, status, limit, cursor, MyCarBookingOut, response)
 
 @router.get("/coupon/{coupon_id}", response_model=float)
 def get_coupon_discount(coupon_id: int, db: Session = Depends(get_db)):
@@ -54,35 +125,100 @@ def get_coupon_discount(coupon_id: int, db: Session = Depends(get_db)):
     
     return coupon.discount
 
+@router.post("/quote", response_model=QuoteResponse)
+def quote_cars(payload: QuoteRequest, db: Session = Depends(get_db)):
+    for window in payload.windows:
+        if window.end_datetime <= window.start_datetime:
+            raise HTTPException(status_code=400, detail="End time must be after start time")
+
+    coupon_discount = 0.0
+    if payload.coupon_id:
+        coupon = db.query(Coupon).filter(Coupon.id == payload.coupon_id, Coupon.used == False).first()
+        if not coupon:
+            raise HTTPException(status_code=400, detail="Invalid or already used coupon")
+        coupon_discount = coupon.discount
+
+    car_ids = list(dict.fromkeys(payload.car_ids))
+    cars = db.query(Car.id, Car.price_per_hour).filter(Car.id.in_(car_ids)).all()
+    prices = {car_id: price for car_id, price in cars}
+    found = [car_id for car_id in car_ids if car_id in prices]
+
+    hours = [booking_hours(window.start_datetime, window.end_datetime) for window in payload.windows]
+    rent, coupon_amount, total = quote_matrix([prices[car_id] for car_id in found], hours, coupon_discount)
+    busy = [busy_car_ids(db, found, window.start_datetime, window.end_datetime) for window in payload.windows]
+
+    quotes = []
+    for i, car_id in enumerate(found):
+        quotes.append({
+            "car_id": car_id,
+            "price_per_hour": prices[car_id],
+            "security_deposit": SECURITY_DEPOSIT,
+            "coupon_discount": coupon_discount,
+            "late_fees": late_fee_schedule(prices[car_id]),
+            "windows": [
+                {
+                    "start_datetime": window.start_datetime,
+                    "end_datetime": window.end_datetime,
+                    "total_hours": hours[j],
+                    "rent": float(rent[i, j]),
+                    "coupon_amount": float(coupon_amount[i, j]),
+                    "total_amount": float(total[i, j]),
+                    "available": car_id not in busy[j],
+                }
+                for j, window in enumerate(payload.windows)
+            ],
+        })
+
+    return {
+        "quotes": quotes,
+        "missing_car_ids": [car_id for car_id in car_ids if car_id not in prices],
+    }
+
 @router.post("/create-razorpay-order")
-def create_razorpay_order(payload: RazorpayOrderRequest):
+async def create_razorpay_order(payload: RazorpayOrderRequest, request: Request, db: Session = Depends(get_db)):
+    return await run_idempotent(request, "create-razorpay-order", payload, partial(_create_razorpay_order, payload, db))
+
+def _order_quote(payload: RazorpayOrderRequest, db: Session):
+    # Priced exactly as _reserve_booking will price the booking; the coupon is
+    # only checked here and is spent when the booking is made
+    if payload.end_datetime <= payload.start_datetime:
+        raise HTTPException(status_code=400, detail="End time must be after start time")
+
+    car = db.query(Car.price_per_hour).filter(Car.id == payload.car_id).first()
+    if not car:
+        raise HTTPException(status_code=404, detail="Car not found")
+
+    coupon_discount = 0.0
+    if payload.coupon_id:
+        coupon = db.query(Coupon).filter(Coupon.id == payload.coupon_id, Coupon.used == False).first()
+        if not coupon:
+            raise HTTPException(status_code=400, detail="Invalid or already used coupon")
+        coupon_discount = coupon.discount
+
+    return quote_booking(car.price_per_hour, payload.start_datetime, payload.end_datetime, coupon_discount)
+
+async def _create_razorpay_order(payload: RazorpayOrderRequest, db: Session):
+    quote = await run_in_threadpool(_order_quote, payload, db)
     try:
-        # Create Razorpay order
+        # Create Razorpay order for the server-side total, never the client's amount
         order_data = {
-            "amount": int(payload.amount),  # Amount should be in paise
+            "amount": amount_in_paise(quote["total_amount"]),
             "currency": payload.currency,
             "receipt": payload.receipt,
             "notes": payload.notes or {}
         }
         
-        order = razorpay_client.order.create(data=order_data)
+        order = await razorpay_gateway.create_order(order_data)
         return order
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating Razorpay order: {str(e)}")
 
 @router.post("/verify-payment")
-def verify_payment(payload: PaymentVerificationRequest):
+async def verify_payment(payload: PaymentVerificationRequest):
     try:
-        # Generate signature verification data
-        generated_signature = hmac.new(
-            bytes(RAZORPAY_KEY_SECRET, "utf-8"),
-            (payload.razorpay_order_id + "|" + payload.razorpay_payment_id).encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        
         # Verify signature
-        is_signature_valid = hmac.compare_digest(
-            generated_signature,
+        is_signature_valid = verify_signature(
+            payload.razorpay_order_id + "|" + payload.razorpay_payment_id,
             payload.razorpay_signature
         )
         
@@ -90,53 +226,84 @@ def verify_payment(payload: PaymentVerificationRequest):
             raise HTTPException(status_code=400, detail="Invalid payment signature")
         
         # Fetch payment details from Razorpay
-        payment = razorpay_client.payment.fetch(payload.razorpay_payment_id)
+        payment = await razorpay_gateway.fetch_payment(payload.razorpay_payment_id)
         
         # Check if payment was successful
         if payment['status'] != 'captured':
             raise HTTPException(status_code=400, detail=f"Payment not successful. Status: {payment['status']}")
         
         return {"status": "success", "payment_id": payload.razorpay_payment_id}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Payment verification failed: {str(e)}")
 
 @router.post("/booking")
-def create_booking(payload: BookingRequest, db: Session = Depends(get_db)):
-    car = db.query(Car).filter(Car.id == payload.car_id).first()
+async def create_booking(payload: BookingRequest, request: Request, db: Session = Depends(get_db)):
+    return await run_idempotent(request, "booking", payload, partial(_create_booking, payload, db))
+
+
+async def _create_booking(payload: BookingRequest, db: Session):
+    if payload.end_datetime <= payload.start_datetime:
+        raise HTTPException(status_code=400, detail="End time must be after start time")
+
+    # Verify payment status before the session touches the database, so no
+    # connection or row lock is held while waiting on Razorpay
+    payment_status = "pending"
+    paid_amount = None
+    if payload.razorpay_payment_id:
+        try:
+            razorpay_payment = await razorpay_gateway.fetch_payment(payload.razorpay_payment_id)
+            if razorpay_payment['status'] == 'captured':
+                payment_status = 'paid'
+                paid_amount = razorpay_payment['amount']
+            else:
+                payment_status = razorpay_payment['status']
+        except PaymentGatewayError as e:
+            print(f"Razorpay fetch error: {str(e)}")
+
+    return await run_in_threadpool(_reserve_booking, payload, payment_status, db, paid_amount)
+
+
+def _reserve_booking(payload: BookingRequest, payment_status: str, db: Session, paid_amount=None):
+    # Lock the car row until commit: concurrent bookings of the same car queue here,
+    # bookings of other cars are unaffected
+    car = db.query(Car).filter(Car.id == payload.car_id).with_for_update().first()
     if not car:
         raise HTTPException(status_code=404, detail="Car not found")
 
+    if load_interval_tree(db, car.id).overlaps(payload.start_datetime, payload.end_datetime):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Car is already booked for the selected time")
+
     pickup_otp = generate_otp()
     drop_otp = generate_otp()
 
+    coupon_discount = 0.0
     if payload.coupon_id:
-        coupon = db.query(Coupon).filter(Coupon.id == payload.coupon_id, Coupon.used == False).first()
+        coupon = db.query(Coupon).filter(Coupon.id == payload.coupon_id, Coupon.used == False).with_for_update().first()
         if not coupon:
+            db.rollback()
             raise HTTPException(status_code=400, detail="Invalid or already used coupon")
         coupon.used = True
+        coupon_discount = coupon.discount
 
+    # Amounts come from the car's current price, never from the client
+    quote = quote_booking(car.price_per_hour, payload.start_datetime, payload.end_datetime, coupon_discount)
 
- 
-    # Verify payment status
-    payment_status = "pending"
-    if payload.razorpay_payment_id:
-        try:
-            razorpay_payment = razorpay_client.payment.fetch(payload.razorpay_payment_id)
-            if razorpay_payment['status'] == 'captured':
-                payment_status = 'paid'
-            else:
-                payment_status = razorpay_payment['status']
-        except Exception as e:
-            print(f"Razorpay fetch error: {str(e)}")
+    # A captured payment (in paise) must cover exactly this booking
+    if paid_amount is not None and paid_amount != amount_in_paise(quote["total_amount"]):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Payment amount does not match the booking total")
 
     payment = Payment(
         booking_id=None, 
         user_id=payload.user_id,
-        total_hours=payload.total_hours,
-        price_per_hour=payload.price_per_hour,
+        total_hours=quote["total_hours"],
+        price_per_hour=quote["price_per_hour"],
         
-        security_deposit=payload.security_deposit,
-        coupon_discount=payload.coupon_discount or 0.0,
+        security_deposit=quote["security_deposit"],
+        coupon_discount=quote["coupon_discount"],
         status=payment_status,
         razorpay_payment_id=payload.razorpay_payment_id,
         created_at=datetime.utcnow()
@@ -157,10 +324,10 @@ def create_booking(payload: BookingRequest, db: Session = Depends(get_db)):
         pickup_otp=pickup_otp,
         drop_otp=drop_otp,
         payment_id=payment.id,
-        total_hours=payload.total_hours,
-        price_per_hour=payload.price_per_hour,
-        security_deposit=payload.security_deposit,
-        coupon_discount=payload.coupon_discount or 0.0,
+        total_hours=quote["total_hours"],
+        price_per_hour=quote["price_per_hour"],
+        security_deposit=quote["security_deposit"],
+        coupon_discount=quote["coupon_discount"],
         created_at=datetime.utcnow()
     )
     db.add(booking)
@@ -168,13 +335,15 @@ def create_booking(payload: BookingRequest, db: Session = Depends(get_db)):
 
     payment.booking_id = booking.id
 
-    new_booking_range = f"{payload.start_datetime.isoformat()} to {payload.end_datetime.isoformat()}"
-    car.future_booking_datetime = (car.future_booking_datetime + " | " + new_booking_range) if car.future_booking_datetime else new_booking_range
+    reserve_interval(db, car, booking.id, payload.start_datetime, payload.end_datetime)
 
     db.commit()
+    invalidate_car(car)
 
     return {
         "message": "Booking successful",
+        "booking_id": booking.id,
+        "quote": quote,
     }
 
 
@@ -212,9 +381,14 @@ def confirm_pickup(data: PickupConfirmation, db: Session = Depends(get_db)):
 
 @router.post("/drop")
 def confirm_drop(data: DropConfirmation, db: Session = Depends(get_db)):
-    booking = db.query(Booking).filter(Booking.id == data.booking_id).first()
-    if not booking:
+    row = load_settlement_rows(db, [data.booking_id]).get(data.booking_id)
+    if not row:
         raise HTTPException(status_code=404, detail="Booking not found")
+    booking, payment, car = row
+
+    # A repeated or retried call must not settle the booking a second time
+    if booking.status in SETTLED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Booking already {booking.status.replace('_', ' ')}")
 
     if booking.drop_otp_used:
         raise HTTPException(status_code=400, detail="Drop already confirmed")
@@ -222,8 +396,10 @@ def confirm_drop(data: DropConfirmation, db: Session = Depends(get_db)):
     if booking.drop_otp != data.otp:
         raise HTTPException(status_code=400, detail="Invalid OTP")
 
+    if not payment:
+        raise HTTPException(status_code=500, detail="Payment not found")
+
     now = datetime.utcnow()
-    booking.status = "completed"
     booking.drop_otp_used = True
     booking.returned_time = now
 
@@ -233,200 +409,63 @@ def confirm_drop(data: DropConfirmation, db: Session = Depends(get_db)):
     booking.after_left_side_image_url = data.after_left_side_image_url or booking.after_left_side_image_url
     booking.after_right_side_image_url = data.after_right_side_image_url or booking.after_right_side_image_url
 
-    # Update car's future_booking_datetime
-    car = db.query(Car).filter(Car.id == booking.car_id).first()
-    time_range = f"{booking.start_datetime} to {booking.end_datetime}"
-    if car and car.future_booking_datetime:
-        slots = car.future_booking_datetime.split(" | ")
-        car.future_booking_datetime = " | ".join([s for s in slots if s.strip() != time_range])
-
-    # Handle refund, late fee, penalty
-    payment = db.query(Payment).filter(Payment.id == booking.payment_id).first()
-    late_charge  = 0
-    refund_amount = 0
-    deduction_reason = None
-    penalty_reason = None
-
-    grace_period_end = booking.end_datetime + timedelta(hours=1)
-    if now > grace_period_end:
-        late_hours = (now - grace_period_end).total_seconds() / 3600
-        late_hours_rounded = round(late_hours + 0.5)  # Round to nearest hour
-        late_charge  = int(payment.price_per_hour * late_hours_rounded)
-
-        if late_charge  <= payment.security_deposit:
-            refund_amount = payment.security_deposit - late_charge 
-            deduction_reason = f"Late return by {late_hours_rounded} hours"
-        else:
-            penalty_amount = late_charge  - payment.security_deposit
-            refund_amount = 0
-            deduction_reason = f"Security fully deducted. Late by {late_hours_rounded} hours"
-            penalty_reason = f"Late return by {late_hours_rounded} hours"
-            
-            
-            penalty = Penalty(
-            user_id=booking.car_owner_id,
-            booking_id=booking.id,
-            penalty_amount=penalty_amount,
-            penalty_reason=penalty_reason,
-            reason="late_drop",
-            payment_status="unpaid"
-    )
-            db.add(penalty)
-    else:
-        refund_amount = payment.security_deposit
-
-    booking.late_charge = late_charge
-    # Create refund
-    refund = Refund(
-        user_id=booking.user_id,
-        booking_id=booking.id,
-        reason="refundable",
-        deduction_amount=late_charge  if late_charge  > 0 else 0,
-        deduction_reason=deduction_reason,
-        refund_amount=refund_amount
-    )
-    db.add(refund)
-
-    db.commit()
-
-    base_rent = booking.total_hours * booking.price_per_hour
-    coupon_discount_amount = round(base_rent * (booking.coupon_discount or 0) / 100)
-    earning_before_payout = booking.late_charge + base_rent - coupon_discount_amount
-
-    # Compute final payout: 90% of the above
-    payout_amount = 0.9 * earning_before_payout
-
-    # Create Payout entry
-    payout = Payout(
-        owner_id=booking.car_owner_id,
-        booking_id=booking.id,
-        car_id=booking.car_id,
-        total_hours=booking.total_hours,
-        price_per_hour=booking.price_per_hour,
-        coupon_discount=booking.coupon_discount or 0,
-        late_charge=booking.late_charge or 0,
-        payout_amount=payout_amount,
-        status='pending',
-    )
+    # Refund, late fee, penalty and payout in one commit
+    apply_settlement(db, booking, car, compute_settlement("drop", booking, payment, now))
 
-    db.add(payout)
     db.commit()
+    if car:
+        invalidate_car(car)
 
     return {"message": "Drop confirmed successfully"}
 
 
 @router.post("/cancel-by-owner")
 def cancel_by_owner(data: BookingCancellationByOwner, db: Session = Depends(get_db)):
-    booking = db.query(Booking).filter(
-        Booking.id == data.booking_id,
-        Booking.car_owner_id == data.owner_id
-    ).first()
-
-    if not booking:
+    row = load_settlement_rows(db, [data.booking_id]).get(data.booking_id)
+    if not row or row[0].car_owner_id != data.owner_id:
         raise HTTPException(status_code=404, detail="Booking not found or not owned by this owner")
+    booking, payment, car = row
+
+    if booking.status in SETTLED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Booking already {booking.status.replace('_', ' ')}")
 
-    payment = db.query(Payment).filter(Payment.id == booking.payment_id).first()
     if not payment:
         raise HTTPException(status_code=500, detail="Payment record not found")
 
-    # Calculate values
-    penalty_amount = 0.1 *(round(payment.total_hours * payment.price_per_hour) -(round(payment.total_hours * payment.price_per_hour)*payment.coupon_discount/100) )# 10% of booking amount
-    refund_amount = round(payment.total_hours * payment.price_per_hour)-(round(payment.total_hours * payment.price_per_hour)*payment.coupon_discount/100) + payment.security_deposit  # Full refund
-
-    # Update booking
-    booking.status = "cancelled_by_owner"
-
-    # Remove slot from car’s future bookings
-    car = db.query(Car).filter(Car.id == booking.car_id).first()
-    time_range = f"{booking.start_datetime} to {booking.end_datetime}"
-    if car and car.future_booking_datetime:
-        slots = car.future_booking_datetime.split(" | ")
-        car.future_booking_datetime = " | ".join([s for s in slots if s.strip() != time_range])
-
-    # Create refund with detailed reason
-    refund = Refund(
-        user_id=booking.user_id,
-        booking_id=booking.id,
-        reason="cancelled_by_owner",
-        deduction_amount=0,
-        deduction_reason="No deductions — full refund due to owner's cancellation",
-        refund_amount=refund_amount
-    )
-    db.add(refund)
-
-    # Create penalty with detailed reason
-    penalty = Penalty(
-        user_id=booking.car_owner_id,
-        booking_id=booking.id,
-        penalty_amount=penalty_amount,
-        penalty_reason="Penalty charged because owner cancelled the booking before trip start",
-        reason="cancelled_by_owner",
-        payment_status="unpaid"
-    )
-    db.add(penalty)
-
-    # Optional: Give user a coupon
-    coupon = Coupon(
-        user_id=booking.user_id,
-        discount=10.0,
-    )
-    db.add(coupon)
+    # Full refund to the user, penalty for the owner, and a coupon for the user
+    apply_settlement(db, booking, car, compute_settlement("owner_cancel", booking, payment, datetime.utcnow()))
 
     db.commit()
+    if car:
+        invalidate_car(car)
 
     return {"message": "Booking cancelled successfully by owner"}
 
 
-from datetime import datetime
-
 @router.post("/cancel")
 def cancel_booking(data: BookingCancellation, db: Session = Depends(get_db)):
-    booking = db.query(Booking).filter(Booking.id == data.booking_id).first()
-    if not booking:
+    row = load_settlement_rows(db, [data.booking_id]).get(data.booking_id)
+    if not row:
         raise HTTPException(status_code=404, detail="Booking not found")
+    booking, payment, car = row
 
     if booking.user_id != data.user_id:
         raise HTTPException(status_code=403, detail="You can only cancel your own booking")
 
-    if booking.status in ["cancelled", "cancelled_by_owner", "completed"]:
+    if booking.status in SETTLED_STATUSES:
         raise HTTPException(status_code=400, detail=f"Booking already {booking.status.replace('_', ' ')}")
 
     now = datetime.utcnow()
     if now >= booking.start_datetime:
         raise HTTPException(status_code=400, detail="Cannot cancel after booking start time")
 
-    payment = db.query(Payment).filter(Payment.id == booking.payment_id).first()
     if not payment:
         raise HTTPException(status_code=500, detail="Payment not found")
 
-   
-    refund_percentage = max(0,data.refund_percentage) 
-
-    refundable_amount = round((round(payment.total_hours * payment.price_per_hour) -(round(payment.total_hours * payment.price_per_hour)*payment.coupon_discount/100) ) * (refund_percentage / 100), 2)
-    deduction_amount = round((round(payment.total_hours * payment.price_per_hour) -(round(payment.total_hours * payment.price_per_hour)*payment.coupon_discount/100) ) - refundable_amount, 2)
-    total_refund = refundable_amount + payment.security_deposit
-
-    # Update booking status
-    booking.status = 'cancelled_by_user'
-
-    # Create refund record
-    refund = Refund(
-        user_id=booking.user_id,
-        booking_id=booking.id,
-        reason="cancelled_by_user",
-        refund_amount=total_refund,
-        deduction_amount=deduction_amount,
-        deduction_reason=f"{round(refund_percentage)}% refund based on remaining time before start"
-    )
-    db.add(refund)
-
-    # Remove time range from future_booking_datetime
-    car = db.query(Car).filter(Car.id == booking.car_id).first()
-    if car and car.future_booking_datetime:
-        time_range = f"{booking.start_datetime} - {booking.end_datetime}"
-        slots = car.future_booking_datetime.split(" | ")
-        car.future_booking_datetime = " | ".join([s for s in slots if s.strip() != time_range])
+    apply_settlement(db, booking, car, compute_settlement("cancel", booking, payment, now, data.refund_percentage))
 
     db.commit()
+    if car:
+        invalidate_car(car)
 
     return {"message": "Booking cancelled"}
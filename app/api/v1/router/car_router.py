@@ -1,100 +1,248 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from schemas.car_schema import CarVerificationRequest, CarSearchResponse, CarSearchRequest, CarOut, CarVerificationRequestStatusUpdate, CarVisibilityChangeRequest
-from models.car_model import Car
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, or_, tuple_, insert, update
+from schemas.car_schema import CarVerificationRequest, CarBulkVerificationRequest, CarBulkItemResult, CarBulkVerificationResponse, CarSearchResponse, CarListingResponse, CarSearchRequest, CarOut, CarVerificationRequestStatusUpdate, CarVisibilityChangeRequest
+from models.car_model import Car, CAR_FULL_LOAD
 from models.user_model import User
 from models.car_verification_model import CarVerification
 from database import get_db
 from datetime import datetime
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func
-from typing import List, Optional
-from math import radians, cos, sin, asin, sqrt
+from typing import List, Optional, Union
+from utils.geo import encode_geohash, bounding_box, covering_geohashes
+from utils.availability import car_is_free, busy_car_ids
+from utils.car_catalog import car_catalog
+from utils.search_kernel import CandidateColumns, rank_candidates
+from utils.pagination import encode_cursor, decode_cursor
+from utils.search_cache import search_cache, search_cache_key, quantize_search, invalidate_car
+from fastapi.encoders import jsonable_encoder
+from utils.streaming import wants_ndjson, stream_query, stream_items
+from utils.etag import make_etag, etag_matches, not_modified
 
-router = APIRouter(prefix="/car", tags=["Car"])
+router = APIRouter()
 
+# Columns needed to build a CarListingResponse
+LISTING_COLUMNS = [getattr(Car, name) for name in CarListingResponse.model_fields if name != "distance"]
 
-router = APIRouter()
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    # Convert decimal degrees to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    # Haversine formula
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    r = 6371  # Radius of earth in kilometers
-    return c * r
-
-
-@router.post("/search-cars", response_model=List[CarSearchResponse])
-def search_cars_optimized(search_params: CarSearchRequest, db: Session = Depends(get_db)):
-    print(search_params)
-    cars = db.query(Car).filter(
+def _db_candidates(search_params: CarSearchRequest, bbox, cells, db: Session):
+    min_lat, min_lon, max_lat, max_lon = bbox
+
+    # Narrow candidates in SQL: attribute filters, geohash prefix range scans, then the exact box
+    filters = [
         Car.is_visible == True,
-        # Car.verification_status == 'approved',
-    ).all()
-    available_cars = []
-    for car in cars:
-        distance = calculate_distance(
-            search_params.latitude,
-            search_params.longitude,
-            car.latitude,
-            car.longitude
-        )
-        if distance < search_params.distance:
-            car_data = CarSearchResponse.from_orm(car)
-            car_data.distance = distance
-            available_cars.append(car_data)
-    filtered_cars = available_cars
-
-    if search_params.carType :
-        filtered_cars = [car for car in filtered_cars if car.car_type == search_params.carType.lower()]
-    
+        Car.verification_status == 'approved',
+        or_(*[Car.geohash.like(f"{cell}%") for cell in cells]),
+        Car.latitude.between(min_lat, max_lat),
+        Car.longitude.between(min_lon, max_lon),
+    ]
+    if search_params.carType:
+        filters.append(Car.car_type == search_params.carType.lower())
     if search_params.transmission:
-        filtered_cars = [car for car in filtered_cars if car.transmission_type == search_params.transmission.lower()]
-
-    if search_params.fuelType :
-        filtered_cars = [car for car in filtered_cars if car.fuel_type == search_params.fuelType.lower()]
-
+        filters.append(Car.transmission_type == search_params.transmission.lower())
+    if search_params.fuelType:
+        filters.append(Car.fuel_type == search_params.fuelType.lower())
     if search_params.minRating:
-        filtered_cars = [car for car in filtered_cars if car.car_rating >= search_params.minRating]
-
-    # Apply sorting
-    if search_params.sortBy == "nearest":
-        filtered_cars.sort(key=lambda x: x.distance)
-    elif search_params.sortBy == "price-low":
-        filtered_cars.sort(key=lambda x: x.price_per_hour)
-    elif search_params.sortBy == "price-high":
-        filtered_cars.sort(key=lambda x: x.price_per_hour, reverse=True)
-
-    return filtered_cars
-
+        filters.append(Car.car_rating >= search_params.minRating)
+    filters.append(car_is_free(search_params.startDateTime, search_params.endDateTime))
+
+    return db.query(Car.id, Car.latitude, Car.longitude, Car.price_per_hour).filter(*filters).all()
+
+
+def _catalog_candidates(search_params: CarSearchRequest, bbox, cells, db: Session):
+    # Same filters as _db_candidates, applied to the in-memory catalog; only availability hits the DB
+    min_lat, min_lon, max_lat, max_lon = bbox
+    car_type = search_params.carType.lower() if search_params.carType else None
+    transmission = search_params.transmission.lower() if search_params.transmission else None
+    fuel_type = search_params.fuelType.lower() if search_params.fuelType else None
+
+    records = [
+        record for record in car_catalog.in_cells(cells)
+        if record.verification_status == 'approved'
+        and min_lat <= record.latitude <= max_lat
+        and min_lon <= record.longitude <= max_lon
+        and (car_type is None or record.car_type == car_type)
+        and (transmission is None or record.transmission_type == transmission)
+        and (fuel_type is None or record.fuel_type == fuel_type)
+        and (not search_params.minRating or record.car_rating >= search_params.minRating)
+    ]
+    busy = busy_car_ids(db, [record.id for record in records], search_params.startDateTime, search_params.endDateTime)
+    return [record for record in records if record.id not in busy]
+
+
+def _search_page(search_params: CarSearchRequest, bbox, cells, db: Session):
+    after = None
+    if search_params.cursor:
+        cursor = decode_cursor(search_params.cursor)
+        if cursor.get("sort") != search_params.sortBy or "key" not in cursor or "id" not in cursor:
+            raise HTTPException(status_code=400, detail="Cursor does not match this search")
+        key, car_id = cursor["key"], cursor["id"]
+        # The ranking kernel compares these against numpy columns; anything else is a forged cursor
+        if isinstance(key, bool) or not isinstance(key, (int, float)) or isinstance(car_id, bool) or not isinstance(car_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = (float(key), car_id)
+
+    if car_catalog.ready:
+        records = {record.id: record for record in _catalog_candidates(search_params, bbox, cells, db)}
+        rows = [(record.id, record.latitude, record.longitude, record.price_per_hour) for record in records.values()]
+    else:
+        records = None
+        rows = _db_candidates(search_params, bbox, cells, db)
+
+    car_ids, distances, sort_keys, has_more = rank_candidates(
+        CandidateColumns(rows),
+        search_params,
+        after=after,
+        limit=search_params.limit
+    )
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor({
+            "sort": search_params.sortBy,
+            "key": float(sort_keys[-1]),
+            "id": int(car_ids[-1]),
+        })
+
+    # Only the page being returned is hydrated, and only with the columns the response needs
+    if search_params.fields == "full":
+        schema, query = CarSearchResponse, db.query(Car).options(*CAR_FULL_LOAD)
+    else:
+        schema, query = CarListingResponse, db.query(Car).options(load_only(*LISTING_COLUMNS))
+    if records is not None:
+        cars = records
+    elif len(car_ids):
+        cars = {car.id: car for car in query.filter(Car.id.in_(car_ids.tolist())).all()}
+    else:
+        cars = {}
+    items = []
+    for car_id, distance in zip(car_ids.tolist(), distances.tolist()):
+        car_data = schema.from_orm(cars[car_id])
+        car_data.distance = distance
+        items.append(jsonable_encoder(car_data))
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.post("/search-cars", response_model=List[Union[CarSearchResponse, CarListingResponse]])
+def search_cars_optimized(search_params: CarSearchRequest, request: Request, response: Response, db: Session = Depends(get_db)):
+    search_params = quantize_search(search_params)
+    bbox = bounding_box(
+        search_params.latitude,
+        search_params.longitude,
+        search_params.distance
+    )
+    cells = covering_geohashes(*bbox)
+
+    key = search_cache_key(search_params)
+    page = search_cache.get(key)
+    if page is None:
+        generation = search_cache.generation(cells)
+        page = _search_page(search_params, bbox, cells, db)
+        search_cache.set(key, page, cells, generation)
+
+    headers = {"X-Next-Cursor": page["next_cursor"]} if page["next_cursor"] else {}
+    if wants_ndjson(request):
+        # A Response is sent as-is; only the JSON branch goes through response_model
+        return stream_items(page["items"], headers=headers)
+    response.headers.update(headers)
+    return page["items"]
 
 
+@router.get("/car-details/{car_id}", response_model=CarOut)
+def get_car_by_id(car_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    record = car_catalog.get(car_id)
+    meta = (record.version, record.updated_at) if record else db.query(Car.version, Car.updated_at).filter(Car.id == car_id).first()
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Car not found")
 
+    etag = make_etag("car", car_id, *meta)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-@router.get("/car-details/{car_id}", response_model=CarOut)
-def get_car_by_id(car_id: int, db: Session = Depends(get_db)):
-    car = db.query(Car).filter(Car.id == car_id).first()
+    car = record or db.query(Car).options(*CAR_FULL_LOAD).filter(Car.id == car_id).first()
     if not car:
         raise HTTPException(status_code=404, detail="Car not found")
+    response.headers["ETag"] = etag
     return car
 
             
 @router.get("/user-cars/{user_id}", response_model=List[CarOut])
-def get_user_cars(user_id: int, db: Session = Depends(get_db)):
+def get_user_cars(user_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     print (user_id)
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User.id).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    cars = db.query(Car).filter(Car.owner_id == user_id).all()
+    # Count and max id catch added/removed cars, the version sum any edit within the same second
+    car_count, last_car_id, version_sum, last_updated_at = db.query(
+        func.count(Car.id), func.max(Car.id), func.coalesce(func.sum(Car.version), 0), func.max(Car.updated_at)
+    ).filter(Car.owner_id == user_id).one()
+    etag = make_etag("user-cars", user_id, car_count, last_car_id, version_sum, last_updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if wants_ndjson(request):
+        return stream_query(lambda stream_db: stream_db.query(Car).options(*CAR_FULL_LOAD).filter(Car.owner_id == user_id), CarOut, ((Car.id, False),), headers={"ETag": etag})
+
+    cars = db.query(Car).options(*CAR_FULL_LOAD).filter(Car.owner_id == user_id).all()
+    response.headers["ETag"] = etag
     return cars
 
 
+def _car_fields(payload: CarVerificationRequest) -> dict:
+    # Car columns copied as-is from a verification payload
+    return dict(
+        company_name=payload.company_name,
+        model_name=payload.model_name,
+        car_number=payload.car_number,
+        manufacture_year=payload.manufacture_year,
+        purchase_type=payload.purchase_type,
+        ownership_count=payload.ownership_count,
+        price_per_hour=payload.price_per_hour,
+        location=payload.location,
+        fuel_type=payload.fuel_type,
+        features=payload.features,
+        latitude=payload.latitude,
+        longitude=payload.longitude,
+        geohash=encode_geohash(payload.latitude, payload.longitude),
+        last_serviced_on=payload.last_serviced_on,
+        car_type=payload.car_type,
+        transmission_type=payload.transmission_type,
+
+        # Car images
+        front_view_image_url=payload.front_view_image_url,
+        rear_view_image_url=payload.rear_view_image_url,
+        left_side_image_url=payload.left_side_image_url,
+        right_side_image_url=payload.right_side_image_url,
+
+        # Verification documents
+        puc_image_url=payload.puc_image_url,
+        puc_expiry_date=payload.puc_expiry_date,
+        rc_image_url=payload.rc_image_url,
+        rc_expiry_date=payload.rc_expiry_date,
+        insurance_image_url=payload.insurance_image_url,
+        insurance_expiry_date=payload.insurance_expiry_date,
+    )
+
+
+def _needs_verification(car: Car, payload: CarVerificationRequest) -> bool:
+    return (
+        car.car_number != payload.car_number or
+        car.puc_image_url != payload.puc_image_url or
+        car.puc_expiry_date != payload.puc_expiry_date or
+        car.rc_image_url != payload.rc_image_url or
+        car.rc_expiry_date != payload.rc_expiry_date or
+        car.insurance_image_url != payload.insurance_image_url or
+        car.insurance_expiry_date != payload.insurance_expiry_date or
+        car.verification_status in ['pending', 'rejected']
+    )
+
+
+def _update_car(car: Car, payload: CarVerificationRequest):
+    # future_booking_datetime is derived from the car's busy intervals, not the payload
+    for field, value in _car_fields(payload).items():
+        setattr(car, field, value)
+    car.updated_at = datetime.utcnow()
+
+
 @router.post("/car-verification")
 def create_or_update_car_request(payload: CarVerificationRequest, db: Session = Depends(get_db)):
     try:
@@ -107,7 +255,7 @@ def create_or_update_car_request(payload: CarVerificationRequest, db: Session =
         existing_car = None
         if payload.car_id:
             print("car_id provided")
-            existing_car = db.query(Car).filter(Car.id == payload.car_id).first()
+            existing_car = db.query(Car).options(*CAR_FULL_LOAD).filter(Car.id == payload.car_id).first()
 
         def create_verification(car: Car):
             verification = CarVerification(
@@ -123,49 +271,11 @@ def create_or_update_car_request(payload: CarVerificationRequest, db: Session =
             return verification
 
         if existing_car:
-            needs_verification = (
-                existing_car.car_number != payload.car_number or
-                existing_car.puc_image_url != payload.puc_image_url or
-                existing_car.puc_expiry_date != payload.puc_expiry_date or
-                existing_car.rc_image_url != payload.rc_image_url or
-                existing_car.rc_expiry_date != payload.rc_expiry_date or
-                existing_car.insurance_image_url != payload.insurance_image_url or
-                existing_car.insurance_expiry_date != payload.insurance_expiry_date or
-                existing_car.verification_status in ['pending', 'rejected']
-            )
+            previous_location = (existing_car.latitude, existing_car.longitude)
+            needs_verification = _needs_verification(existing_car, payload)
 
-            # Always update car info
-            existing_car.company_name = payload.company_name
-            existing_car.model_name = payload.model_name
-            existing_car.manufacture_year = payload.manufacture_year
-            existing_car.purchase_type = payload.purchase_type
-            existing_car.ownership_count = payload.ownership_count
-            existing_car.price_per_hour = payload.price_per_hour
-            existing_car.location = payload.location
-            existing_car.fuel_type = payload.fuel_type
-            existing_car.features = payload.features
-            existing_car.latitude = payload.latitude
-            existing_car.longitude = payload.longitude
-            existing_car.last_serviced_on = payload.last_serviced_on
-            existing_car.future_booking_datetime = payload.future_booking_datetime
-            existing_car.car_type = payload.car_type
-            existing_car.transmission_type = payload.transmission_type
-            existing_car.updated_at = datetime.utcnow()
-
-            # Update car images
-            existing_car.front_view_image_url = payload.front_view_image_url
-            existing_car.rear_view_image_url = payload.rear_view_image_url
-            existing_car.left_side_image_url = payload.left_side_image_url
-            existing_car.right_side_image_url = payload.right_side_image_url
-
-            # Update verification-related fields regardless
-            existing_car.car_number = payload.car_number
-            existing_car.puc_image_url = payload.puc_image_url
-            existing_car.puc_expiry_date = payload.puc_expiry_date
-            existing_car.rc_image_url = payload.rc_image_url
-            existing_car.rc_expiry_date = payload.rc_expiry_date
-            existing_car.insurance_image_url = payload.insurance_image_url
-            existing_car.insurance_expiry_date = payload.insurance_expiry_date
+            # Always update car info, images and verification-related fields
+            _update_car(existing_car, payload)
 
             if needs_verification:
                 print("Creating new verification")
@@ -180,37 +290,11 @@ def create_or_update_car_request(payload: CarVerificationRequest, db: Session =
             # Create new car
             new_car = Car(
                 owner_id=payload.owner_id,
-                company_name=payload.company_name,
-                model_name=payload.model_name,
-                car_number=payload.car_number,
-                manufacture_year=payload.manufacture_year,
-                purchase_type=payload.purchase_type,
-                ownership_count=payload.ownership_count,
-                price_per_hour=payload.price_per_hour,
-                location=payload.location,
-                fuel_type=payload.fuel_type,
-                last_serviced_on=payload.last_serviced_on,
-                features=payload.features,
-                puc_image_url=payload.puc_image_url,
-                puc_expiry_date=payload.puc_expiry_date,
-                rc_image_url=payload.rc_image_url,
-                rc_expiry_date=payload.rc_expiry_date,
-                insurance_image_url=payload.insurance_image_url,
-                insurance_expiry_date=payload.insurance_expiry_date,
-                latitude=payload.latitude,
-                longitude=payload.longitude,
-                car_type=payload.car_type,
-                transmission_type=payload.transmission_type,
-                future_booking_datetime=payload.future_booking_datetime,            
+                **_car_fields(payload),
+                future_booking_datetime="",
                 is_visible=True,
                 created_at=datetime.utcnow(),
                 updated_at=datetime.utcnow(),
-
-                # Car images
-                front_view_image_url=payload.front_view_image_url,
-                rear_view_image_url=payload.rear_view_image_url,
-                left_side_image_url=payload.left_side_image_url,
-                right_side_image_url=payload.right_side_image_url,
             )
 
             db.add(new_car)
@@ -220,11 +304,125 @@ def create_or_update_car_request(payload: CarVerificationRequest, db: Session =
             car_id = new_car.id  # Return the car_id
 
         db.commit()
+
+        if existing_car:
+            search_cache.invalidate_point(*previous_location)
+            invalidate_car(existing_car)
         return {"message": message, "car_id": car_id}
     except Exception as e:
         print(f"Error: {str(e)}")
         raise HTTPException(status_code=422, detail=f"Validation Error: {str(e)}")
 
+
+@router.post("/car-verification/bulk", response_model=CarBulkVerificationResponse)
+def bulk_create_or_update_cars(payload: CarBulkVerificationRequest, db: Session = Depends(get_db)):
+    items = payload.cars
+    results = [None] * len(items)
+
+    # One lookup for owners and one for the cars the batch refers to (by id or by owner + number)
+    owner_ids = {item.owner_id for item in items}
+    known_owners = {owner_id for (owner_id,) in db.query(User.id).filter(User.id.in_(owner_ids)).all()}
+
+    car_ids = {item.car_id for item in items if item.car_id}
+    plates = {(item.owner_id, item.car_number) for item in items if not item.car_id}
+    lookups = []
+    if car_ids:
+        lookups.append(Car.id.in_(car_ids))
+    if plates:
+        lookups.append(tuple_(Car.owner_id, Car.car_number).in_(plates))
+    # Full rows: the verification check compares the document and image URLs
+    existing_cars = db.query(Car).options(*CAR_FULL_LOAD).filter(or_(*lookups)).order_by(Car.id).all()
+    cars_by_id = {car.id: car for car in existing_cars}
+    cars_by_plate = {(car.owner_id, car.car_number): car for car in existing_cars}
+
+    try:
+        seen = set()
+        touched_locations = []
+        to_verify = []      # existing cars that need a fresh verification
+        new_rows = []       # (index, row) for cars to insert
+        now = datetime.utcnow()
+
+        for index, item in enumerate(items):
+            car = cars_by_id.get(item.car_id) if item.car_id else cars_by_plate.get((item.owner_id, item.car_number))
+            identity = ("id", car.id) if car else ("plate", item.owner_id, item.car_number)
+
+            if item.owner_id not in known_owners:
+                results[index] = CarBulkItemResult(index=index, status="failed", message="User not found")
+            elif item.car_id and not car:
+                results[index] = CarBulkItemResult(index=index, status="failed", message="Car not found")
+            elif car and car.owner_id != item.owner_id:
+                results[index] = CarBulkItemResult(index=index, status="failed", message="Car belongs to another owner")
+            elif identity in seen:
+                results[index] = CarBulkItemResult(index=index, status="failed", message="Duplicate car in batch")
+            elif car:
+                seen.add(identity)
+                touched_locations.append((car.latitude, car.longitude))
+                touched_locations.append((item.latitude, item.longitude))
+                if _needs_verification(car, item):
+                    to_verify.append(car)
+                    message = "Car updated and re-sent for verification"
+                else:
+                    message = "Car updated without verification request"
+                _update_car(car, item)
+                results[index] = CarBulkItemResult(index=index, car_id=car.id, status="updated", message=message)
+            else:
+                seen.add(identity)
+                new_rows.append((index, dict(
+                    owner_id=item.owner_id,
+                    **_car_fields(item),
+                    future_booking_datetime="",
+                    is_visible=True,
+                    verification_status='in_process',
+                    created_at=now,
+                    updated_at=now,
+                )))
+
+        # Bulk insert new cars, then read their ids back by owner + car number
+        new_car_ids = {}
+        if new_rows:
+            db.execute(insert(Car), [row for _, row in new_rows])
+            new_plates = {(row["owner_id"], row["car_number"]) for _, row in new_rows}
+            for car_id, owner_id, car_number in db.query(Car.id, Car.owner_id, Car.car_number).filter(
+                tuple_(Car.owner_id, Car.car_number).in_(new_plates)
+            ).all():
+                new_car_ids[(owner_id, car_number)] = car_id
+            for index, row in new_rows:
+                car_id = new_car_ids[(row["owner_id"], row["car_number"])]
+                results[index] = CarBulkItemResult(index=index, car_id=car_id, status="created", message="New car added and sent for verification")
+
+        # Bulk insert verification rows and link each car to its new verification
+        verify_ids = [car.id for car in to_verify] + list(new_car_ids.values())
+        if verify_ids:
+            db.execute(insert(CarVerification), [
+                dict(car_id=car_id, status='pending', created_at=now, updated_at=now) for car_id in verify_ids
+            ])
+            latest = dict(db.query(CarVerification.car_id, func.max(CarVerification.id)).filter(
+                CarVerification.car_id.in_(verify_ids)
+            ).group_by(CarVerification.car_id).all())
+            for car in to_verify:
+                car.last_verification_id = latest[car.id]
+                car.verification_status = 'in_process'
+            if new_car_ids:
+                db.execute(update(Car), [
+                    dict(id=car_id, last_verification_id=latest[car_id]) for car_id in new_car_ids.values()
+                ])
+
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error: {str(e)}")
+        raise HTTPException(status_code=422, detail=f"Validation Error: {str(e)}")
+
+    for location in touched_locations:
+        search_cache.invalidate_point(*location)
+
+    return CarBulkVerificationResponse(
+        results=results,
+        created=sum(1 for result in results if result.status == "created"),
+        updated=sum(1 for result in results if result.status == "updated"),
+        failed=sum(1 for result in results if result.status == "failed"),
+    )
+
 @router.post("/change-visibility")
 def change_car_visibility(payload: CarVisibilityChangeRequest, db: Session = Depends(get_db)):
     car = db.query(Car).filter(Car.id == payload.car_id).first()
@@ -235,5 +433,6 @@ def change_car_visibility(payload: CarVisibilityChangeRequest, db: Session = Dep
     car.is_visible = not car.is_visible
     car.updated_at = datetime.utcnow()
     db.commit()
+    invalidate_car(car)
 
     return {"message": f"Car visibility updated to {car.is_visible}"}
@@ -1,27 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import or_, and_
 from sqlalchemy.orm import Session
-from schemas.user_schema import  UserVerificationStatusUpdate, CarVerificationOut, UserVerificationOut
+from schemas.user_schema import  UserVerificationStatusUpdate, CarVerificationOut, UserVerificationOut, VerificationClaimRequest, VerificationReleaseRequest
 from models.user_model import User
 from database import get_db
 from datetime import datetime
 from models.car_verification_model import CarVerification
 from models.user_verification_model import UserVerification
 from models.car_model import Car
-from typing import List
+from typing import List, Optional
 from schemas.car_schema import CarVerificationRequestStatusUpdate
+from utils.search_cache import invalidate_car
+from utils.pagination import encode_cursor, decode_cursor
+from utils.verification_queue import claim_next, release, leased_to_other
 
 router = APIRouter(prefix="/employee", tags=["Employee"])
 
+
+def _pending_page(db: Session, model, limit, cursor, response: Response):
+    # Oldest first, keyset-paginated on the (status, created_at) index
+    query = db.query(model).filter(model.status == 'pending')
+
+    if cursor:
+        after = decode_cursor(cursor)
+        try:
+            last_created = datetime.fromisoformat(after["created"])
+            last_id = int(after["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(or_(model.created_at > last_created, and_(model.created_at == last_created, model.id > last_id)))
+
+    items = query.order_by(model.created_at, model.id).limit(limit + 1).all()
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor({"created": items[-1].created_at.isoformat(), "id": items[-1].id})
+    return items
+
+
 @router.get("/all-user-verifications", response_model=List[UserVerificationOut])
-def get_all_user_verifications(db: Session = Depends(get_db)):
-    user_verifications = db.query(UserVerification).filter(UserVerification.status == 'pending').all()
-    print(user_verifications)
-    return user_verifications
+def get_all_user_verifications(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    return _pending_page(db, UserVerification, limit, cursor, response)
 
 @router.get("/all-car-verifications", response_model=List[CarVerificationOut])
-def get_all_car_verifications(db: Session = Depends(get_db)):
-    car_verifications = db.query(CarVerification).filter(CarVerification.status == 'pending').all()
-    return car_verifications
+def get_all_car_verifications(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    return _pending_page(db, CarVerification, limit, cursor, response)
+
+
+@router.post("/user-verifications/claim", response_model=List[UserVerificationOut])
+def claim_user_verifications(payload: VerificationClaimRequest, db: Session = Depends(get_db)):
+    return claim_next(db, UserVerification, UserVerificationOut, payload.reviewer_id, payload.limit)
+
+@router.post("/car-verifications/claim", response_model=List[CarVerificationOut])
+def claim_car_verifications(payload: VerificationClaimRequest, db: Session = Depends(get_db)):
+    return claim_next(db, CarVerification, CarVerificationOut, payload.reviewer_id, payload.limit)
+
+
+@router.post("/user-verifications/release")
+def release_user_verifications(payload: VerificationReleaseRequest, db: Session = Depends(get_db)):
+    return {"released": release(db, UserVerification, payload.reviewer_id, payload.verification_ids)}
+
+@router.post("/car-verifications/release")
+def release_car_verifications(payload: VerificationReleaseRequest, db: Session = Depends(get_db)):
+    return {"released": release(db, CarVerification, payload.reviewer_id, payload.verification_ids)}
 
 
 @router.post("/user-verification-update")
@@ -29,9 +79,11 @@ def update_verification_status(
     payload: UserVerificationStatusUpdate,
     db: Session = Depends(get_db)
 ):
-    verification = db.query(UserVerification).filter(UserVerification.id == payload.verification_id).first()
+    verification = db.query(UserVerification).filter(UserVerification.id == payload.verification_id).with_for_update().first()
     if not verification:
         raise HTTPException(status_code=404, detail="Verification record not found")
+    if leased_to_other(verification, payload.verifier_id):
+        raise HTTPException(status_code=409, detail="Verification is claimed by another reviewer")
 
     user = db.query(User).filter(User.id == verification.user_id).first()
     if not user:
@@ -43,6 +95,8 @@ def update_verification_status(
     verification.status = payload.status
     verification.verifier_id = payload.verifier_id
     verification.updated_at = datetime.utcnow()
+    verification.claimed_by = None
+    verification.lease_expires_at = None
 
     user.verification_status = payload.status
     user.last_verified_id = verification.id
@@ -64,9 +118,11 @@ def update_verification_status(
 @router.post("/car-verification-update")
 def respond_to_car_request(payload: CarVerificationRequestStatusUpdate, db: Session = Depends(get_db)):
     # Get the verification record using the provided verification_id
-    car_verification = db.query(CarVerification).filter(CarVerification.id == payload.verification_id).first()
+    car_verification = db.query(CarVerification).filter(CarVerification.id == payload.verification_id).with_for_update().first()
     if not car_verification:
         raise HTTPException(status_code=404, detail="No verification found")
+    if leased_to_other(car_verification, payload.verifier_id):
+        raise HTTPException(status_code=409, detail="Verification is claimed by another reviewer")
 
     # Now get the car from the verification record
     car = db.query(Car).filter(Car.id == car_verification.car_id).first()
@@ -82,6 +138,8 @@ def respond_to_car_request(payload: CarVerificationRequestStatusUpdate, db: Sess
     car_verification.rejection_reason = payload.rejection_reason
     car_verification.verifier_id = payload.verifier_id
     car_verification.updated_at = datetime.utcnow()
+    car_verification.claimed_by = None
+    car_verification.lease_expires_at = None
 
     # Update car verification status
     car.verification_status = payload.status
@@ -90,6 +148,7 @@ def respond_to_car_request(payload: CarVerificationRequestStatusUpdate, db: Sess
     car.updated_at = datetime.utcnow()
 
     db.commit()
+    invalidate_car(car)
 
     return {"message": "Car verification status updated successfully"}
 
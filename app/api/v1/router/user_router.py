@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from models.payout_model import Payout
 from schemas.user_schema import PayoutClaim, PenaltyPaymentUpdate, SystemReviewCreate, RefundClaimIn, SystemReviewOut, UserOut, UserNameUpdate, VerificationCheckRequest, VerificationCheckResponse, UserVerificationRequest, UserVerificationStatusUpdate, RefundOut, PenaltyOut, PaymentOut, CouponOut, CarVerificationOut, UserVerificationOut
@@ -13,6 +13,9 @@ from models.car_verification_model import CarVerification
 from models.system_review_model import SystemReview
 from models.user_verification_model import UserVerification
 from typing import List
+from utils.etag import make_etag, etag_matches, not_modified
+from utils.idempotency import run_idempotent
+from functools import partial
 
 router = APIRouter(prefix="/user", tags=["User"])
 
@@ -159,8 +162,17 @@ def cancel_verification_request(
 
 
 @router.get("/{user_id}", response_model=UserOut)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    meta = db.query(User.version, User.updated_at).filter(User.id == user_id).first()
+    if not meta:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    etag = make_etag("user", user_id, meta.version, meta.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     user = db.query(User).filter(User.id == user_id).first()
+    response.headers["ETag"] = etag
     return user
 
 @router.get("/refunds/{user_id}", response_model=List[RefundOut])
@@ -228,7 +240,11 @@ def claim_payout(data: PayoutClaim, db: Session = Depends(get_db)):
 
 
 @router.put("/pay-penalty")
-def update_penalty_payment(data: PenaltyPaymentUpdate, db: Session = Depends(get_db)):
+async def update_penalty_payment(data: PenaltyPaymentUpdate, request: Request, db: Session = Depends(get_db)):
+    return await run_idempotent(request, "pay-penalty", data, partial(_pay_penalty, data, db))
+
+
+def _pay_penalty(data: PenaltyPaymentUpdate, db: Session):
     penalty = db.query(Penalty).filter(Penalty.id == data.penalty_id).first()
 
     if not penalty:
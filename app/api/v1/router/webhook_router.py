@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from models.webhook_event_model import WebhookEvent
+from database import SessionLocal
+from datetime import datetime
+from config import RAZORPAY_WEBHOOK_SECRET
+from utils.payment_gateway import verify_signature
+import json
+
+router = APIRouter(prefix="/webhooks", tags=["Webhook"])
+
+
+def _enqueue(event_id, event, body):
+    db = SessionLocal()
+    try:
+        db.add(WebhookEvent(
+            source='razorpay',
+            event_id=event_id,
+            event=event,
+            payload=body,
+            status='pending',
+            created_at=datetime.utcnow()
+        ))
+        db.commit()
+    except IntegrityError:
+        # Redelivery of an event we already hold
+        db.rollback()
+    finally:
+        db.close()
+
+
+@router.post("/razorpay")
+async def razorpay_webhook(request: Request):
+    body = (await request.body()).decode("utf-8")
+    signature = request.headers.get("X-Razorpay-Signature", "")
+    if not RAZORPAY_WEBHOOK_SECRET or not verify_signature(body, signature, RAZORPAY_WEBHOOK_SECRET):
+        raise HTTPException(status_code=400, detail="Invalid webhook signature")
+
+    try:
+        event = json.loads(body).get("event")
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+    if not event:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+
+    # Only queue here; the webhook worker applies events in batches
+    await run_in_threadpool(_enqueue, request.headers.get("X-Razorpay-Event-Id"), event, body)
+    return {"status": "queued"}
@@ -0,0 +1,93 @@
+"""
+List queries with every column loaded versus the wide Text columns deferred.
+
+full:     Car with CAR_FULL_LOAD (all image URLs, features and rendered
+          bookings) and Booking with its 'inspection' image group undeferred,
+          which is what every list query fetched before the columns were deferred.
+deferred: the default mapping, which leaves those columns out of the SELECT.
+
+Prints approximate bytes per row and best-of-5 hydration time per row count.
+
+Run from app/ as `python -m benchmarks.bench_deferred_columns` or directly as
+`python benchmarks/bench_deferred_columns.py`.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Direct execution puts benchmarks/ rather than app/ on sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import bench_engine, reset_schema, insert_fleet, best_of, row_bytes, IMAGE_URL
+
+from sqlalchemy import insert, inspect, select
+from sqlalchemy.orm import undefer_group
+from models.car_model import Car, CAR_FULL_LOAD
+from models.booking_model import Booking
+from models.user_model import User
+
+ROW_COUNTS = (1000, 5000, 20000)
+
+BOOKING_FULL_LOAD = (undefer_group('inspection'),)
+
+
+def insert_bookings(Session, count):
+    db = Session()
+    db.add(User(id=2, mobile_number="9000000002"))
+    db.flush()
+    start = datetime(2030, 1, 1, 10)
+    images = {
+        f"{stage}_{side}_image_url": IMAGE_URL
+        for stage in ("before", "after") for side in ("front", "rear", "left_side", "right_side")
+    }
+    rows = [
+        dict(
+            user_id=2, car_id=index + 1, car_owner_id=1, pickup_delivery_location="Pune",
+            start_datetime=start + timedelta(hours=index), end_datetime=start + timedelta(hours=index + 3),
+            status="completed", total_hours=3, price_per_hour=100, security_deposit=2000,
+            pickup_otp="1234", drop_otp="5678", created_at=start, updated_at=start, **images,
+        )
+        for index in range(count)
+    ]
+    for offset in range(0, len(rows), 5000):
+        db.execute(insert(Booking), rows[offset:offset + 5000])
+    db.commit()
+    db.close()
+
+
+def loaded_columns(model, full):
+    return [prop.columns[0] for prop in inspect(model).column_attrs if full or not prop.deferred]
+
+
+def measure(db, model, options):
+    def hydrate():
+        rows = db.query(model).options(*options).all()
+        db.expunge_all()
+        return rows
+    return best_of(hydrate)[0]
+
+
+def main():
+    print(f"{bench_engine().dialect.name}: list queries, every column vs wide columns deferred")
+    print(f"{'table':>7} {'rows':>6} | {'full bytes/row':>14} {'ms':>8} | {'deferred bytes/row':>18} {'ms':>7}")
+    for count in ROW_COUNTS:
+        Session = reset_schema(bench_engine())
+        insert_fleet(Session, count)
+        insert_bookings(Session, count)
+        db = Session()
+        try:
+            for model, full_load in ((Car, CAR_FULL_LOAD), (Booking, BOOKING_FULL_LOAD)):
+                full_bytes = row_bytes(db.execute(select(*loaded_columns(model, True))).all()) / count
+                lean_bytes = row_bytes(db.execute(select(*loaded_columns(model, False))).all()) / count
+                full_ms = measure(db, model, full_load)
+                lean_ms = measure(db, model, ())
+                print(
+                    f"{model.__tablename__:>7} {count:>6} | {full_bytes:>14.0f} {full_ms:>8.1f} |"
+                    f" {lean_bytes:>18.0f} {lean_ms:>7.1f}"
+                )
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Car search candidate query before and after the filters moved into SQL.
+
+before: every visible car is fetched as a full row and carType, transmission,
+        fuelType, minRating and the box are applied in Python.
+after:  _db_candidates, with all filters as SQL predicates over the composite
+        indexes, fetching only (id, latitude, longitude, price_per_hour).
+
+Prints rows transferred, approximate bytes and best-of-5 latency per fleet size.
+
+Run from app/ as `python -m benchmarks.bench_search_filters` or directly as
+`python benchmarks/bench_search_filters.py`.
+"""
+import os
+import sys
+from datetime import datetime
+
+# Direct execution puts benchmarks/ rather than app/ on sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import bench_engine, reset_schema, insert_fleet, best_of, row_bytes
+
+from sqlalchemy import select
+from models.car_model import Car
+from schemas.car_schema import CarSearchRequest
+from utils.geo import bounding_box, covering_geohashes
+from api.v1.router.car_router import _db_candidates
+
+FLEET_SIZES = (1000, 5000, 20000, 50000)
+
+SEARCH = CarSearchRequest(
+    latitude=18.52, longitude=73.85, distance=25,
+    startDateTime=datetime(2030, 2, 1, 10), endDateTime=datetime(2030, 2, 1, 14),
+    carType="suv", transmission="automatic", fuelType="petrol", minRating=4,
+)
+
+
+def python_filtered(db, bbox):
+    min_lat, min_lon, max_lat, max_lon = bbox
+    rows = db.execute(select(Car.__table__).where(Car.is_visible == True)).all()
+    kept = [
+        row for row in rows
+        if row.verification_status == 'approved'
+        and min_lat <= row.latitude <= max_lat and min_lon <= row.longitude <= max_lon
+        and row.car_type == SEARCH.carType and row.transmission_type == SEARCH.transmission
+        and row.fuel_type == SEARCH.fuelType and row.car_rating >= SEARCH.minRating
+    ]
+    return rows, kept
+
+
+def main():
+    bbox = bounding_box(SEARCH.latitude, SEARCH.longitude, SEARCH.distance)
+    cells = covering_geohashes(*bbox)
+
+    print(f"{bench_engine().dialect.name}: {SEARCH.distance:.0f} km, suv/automatic/petrol, rating >= {SEARCH.minRating:g}")
+    print(f"{'fleet':>7} | {'before rows':>11} {'bytes':>11} {'ms':>8} | {'after rows':>10} {'bytes':>8} {'ms':>7} | {'matches':>7}")
+    for size in FLEET_SIZES:
+        Session = reset_schema(bench_engine())
+        insert_fleet(Session, size)
+        db = Session()
+        try:
+            before_ms, (fetched, kept) = best_of(lambda: python_filtered(db, bbox))
+            after_ms, candidates = best_of(lambda: _db_candidates(SEARCH, bbox, cells, db))
+        finally:
+            db.close()
+        assert {row.id for row in kept} == {row.id for row in candidates}
+        print(
+            f"{size:>7} | {len(fetched):>11} {row_bytes(fetched):>11} {before_ms:>8.1f} |"
+            f" {len(candidates):>10} {row_bytes(candidates):>8} {after_ms:>7.1f} | {len(kept):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
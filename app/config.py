@@ -15,3 +15,59 @@ CLOUDINARY_API_SECRET=os.getenv("CLOUDINARY_API_SECRET")
 
 
 GEMINI_API_KEY=os.getenv("GEMINI_API_KEY")
+
+# Search result cache: "memory" (per process) or "redis" (shared, needs the redis package)
+SEARCH_CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory")
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000"))
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "300"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# In-memory catalog of visible cars, refreshed from Car.updated_at every CAR_CATALOG_SYNC_SECONDS
+CAR_CATALOG_ENABLED = os.getenv("CAR_CATALOG_ENABLED", "true").lower() == "true"
+CAR_CATALOG_SYNC_SECONDS = float(os.getenv("CAR_CATALOG_SYNC_SECONDS", "5"))
+
+RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
+RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
+# Point at a local fake gateway in tests/dev
+RAZORPAY_API_BASE = os.getenv("RAZORPAY_API_BASE", "https://api.razorpay.com/v1")
+RAZORPAY_CONNECT_TIMEOUT_SECONDS = float(os.getenv("RAZORPAY_CONNECT_TIMEOUT_SECONDS", "2"))
+RAZORPAY_TIMEOUT_SECONDS = float(os.getenv("RAZORPAY_TIMEOUT_SECONDS", "5"))
+RAZORPAY_MAX_CONNECTIONS = int(os.getenv("RAZORPAY_MAX_CONNECTIONS", "50"))
+
+# Idempotency-Key responses are kept this long; an in-flight claim older than the lock time can be taken over
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+IDEMPOTENCY_PURGE_SECONDS = float(os.getenv("IDEMPOTENCY_PURGE_SECONDS", "3600"))
+
+# Refundable deposit charged on every booking, in INR. Required and without a default, since it is
+# part of what every customer pays: the app refuses to start without it (see .env.example)
+SECURITY_DEPOSIT = float(os.environ["SECURITY_DEPOSIT"]) if os.getenv("SECURITY_DEPOSIT") else None
+
+# Booking lifecycle scheduler: one API worker at a time holds the lease and runs the sweeps
+BOOKING_SCHEDULER_ENABLED = os.getenv("BOOKING_SCHEDULER_ENABLED", "true").lower() == "true"
+BOOKING_SCHEDULER_WINDOW_SECONDS = float(os.getenv("BOOKING_SCHEDULER_WINDOW_SECONDS", "900"))
+BOOKING_SCHEDULER_TICK_SECONDS = float(os.getenv("BOOKING_SCHEDULER_TICK_SECONDS", "5"))
+BOOKING_SCHEDULER_LEASE_SECONDS = float(os.getenv("BOOKING_SCHEDULER_LEASE_SECONDS", "30"))
+# A booked car not picked up this long after start_datetime is cancelled by the system
+NO_SHOW_GRACE_MINUTES = int(os.getenv("NO_SHOW_GRACE_MINUTES", "120"))
+
+# Razorpay webhooks are queued in webhook_event and applied in batches by a background worker
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET")
+WEBHOOK_WORKER_ENABLED = os.getenv("WEBHOOK_WORKER_ENABLED", "true").lower() == "true"
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "200"))
+WEBHOOK_POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS", "1"))
+
+# Admin dashboard payload is served from memory and recomputed in the background once older than this
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "30"))
+
+# Employee verification work queue: a claimed item stays with its reviewer until the lease runs out
+VERIFICATION_LEASE_SECONDS = float(os.getenv("VERIFICATION_LEASE_SECONDS", "900"))
+VERIFICATION_CLAIM_LIMIT = int(os.getenv("VERIFICATION_CLAIM_LIMIT", "50"))
+
+# Settings the API cannot run without; checked when the app starts
+REQUIRED_SETTINGS = ("SECURITY_DEPOSIT",)
+
+
+def missing_settings():
+    return [name for name in REQUIRED_SETTINGS if globals()[name] is None]
@@ -7,6 +7,14 @@ from models.car_model import Car
 from models.car_verification_model import CarVerification
 from models.user_verification_model import UserVerification
 from models.otp_model import Otp
+from models.car_busy_interval_model import CarBusyInterval
+from models.idempotency_key_model import IdempotencyKey
+from models.scheduler_lease_model import SchedulerLease
+from models.webhook_event_model import WebhookEvent
+from models.dashboard_metric_model import DashboardMetric
+from models.dashboard_metric_delta_model import DashboardMetricDelta
+from models.daily_rollup_model import DailyRollup
+from models.daily_rollup_delta_model import DailyRollupDelta
 
 # import other models if needed
 
@@ -6,8 +6,15 @@ from api.v1.router import car_router
 from api.v1.router import boooking_router
 from api.v1.router import employee_router
 from api.v1.router import admin_router
+from api.v1.router import webhook_router
 from fastapi.middleware.cors import CORSMiddleware
 from models.base import Base
+from utils.car_catalog import start_car_catalog
+from utils.payment_gateway import razorpay_gateway
+from utils.idempotency import start_idempotency_purge
+from utils.booking_scheduler import start_booking_scheduler
+from utils.webhook_worker import start_webhook_worker
+from config import missing_settings
 
 app = FastAPI()
 
@@ -21,9 +28,31 @@ app.add_middleware(
 
 Base.metadata.create_all(bind=engine)
 
+
+@app.on_event("startup")
+def check_settings():
+    missing = missing_settings()
+    if missing:
+        raise RuntimeError(f"Missing required settings: {', '.join(missing)}. Set them in the environment or .env (see .env.example)")
+
+
+@app.on_event("startup")
+def start_background_workers():
+    start_car_catalog()
+    start_idempotency_purge()
+    start_booking_scheduler()
+    start_webhook_worker()
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await razorpay_gateway.close()
+
+
 app.include_router(user_router.router, prefix="/api/v1", tags=["User"])
 app.include_router(otp_router.router, prefix="/api/v1", tags=["Otp"])
 app.include_router(car_router.router, prefix="/api/v1", tags=["Car"])
 app.include_router(boooking_router.router, prefix="/api/v1", tags=["Booking"])
 app.include_router(employee_router.router, prefix="/api/v1", tags=["Employee"])
 app.include_router(admin_router.router, prefix="/api/v1", tags=["Admin"])
+app.include_router(webhook_router.router, prefix="/api/v1", tags=["Webhook"])
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, Text, String, Float, DateTime, Enum, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, Text, String, Float, DateTime, Enum, ForeignKey, Boolean, Index
+from sqlalchemy.orm import deferred
 from datetime import datetime
 from models.base import Base
 
@@ -32,6 +33,7 @@ class Booking(Base):
 
     picked_time = Column(DateTime, nullable=True)
     returned_time = Column(DateTime, nullable=True)
+    overdue_at = Column(DateTime, nullable=True)  # set by the scheduler once a picked car is past its return time
 
     pickup_otp = Column(String(10), nullable=True)
     pickup_otp_used = Column(Boolean, default=False)
@@ -39,15 +41,23 @@ class Booking(Base):
     drop_otp = Column(String(10), nullable=True)
     drop_otp_used = Column(Boolean, default=False)
 
-    before_front_image_url = Column(Text, nullable=True)
-    before_rear_image_url = Column(Text, nullable=True)
-    before_left_side_image_url = Column(Text, nullable=True)
-    before_right_side_image_url = Column(Text, nullable=True)
+    # 'inspection' group: pickup/drop inspection images are only read by the pickup and drop flows
+    before_front_image_url = deferred(Column(Text, nullable=True), group='inspection')
+    before_rear_image_url = deferred(Column(Text, nullable=True), group='inspection')
+    before_left_side_image_url = deferred(Column(Text, nullable=True), group='inspection')
+    before_right_side_image_url = deferred(Column(Text, nullable=True), group='inspection')
 
-    after_front_image_url = Column(Text, nullable=True)
-    after_rear_image_url = Column(Text, nullable=True)
-    after_left_side_image_url = Column(Text, nullable=True)
-    after_right_side_image_url = Column(Text, nullable=True)
+    after_front_image_url = deferred(Column(Text, nullable=True), group='inspection')
+    after_rear_image_url = deferred(Column(Text, nullable=True), group='inspection')
+    after_left_side_image_url = deferred(Column(Text, nullable=True), group='inspection')
+    after_right_side_image_url = deferred(Column(Text, nullable=True), group='inspection')
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_booking_user_history', 'user_id', 'status', 'start_datetime'),
+        Index('ix_booking_owner_history', 'car_owner_id', 'status', 'start_datetime'),
+        Index('ix_booking_status_start', 'status', 'start_datetime'),
+        Index('ix_booking_status_end', 'status', 'end_datetime'),
+    )
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from datetime import datetime
+from models.base import Base
+
+class CarBusyInterval(Base):
+    __tablename__ = 'car_busy_interval'
+
+    id = Column(Integer, primary_key=True)
+    car_id = Column(Integer, ForeignKey('car.id'), nullable=False)
+    booking_id = Column(Integer, ForeignKey('booking.id'), nullable=True)
+
+    start_datetime = Column(DateTime, nullable=False)
+    end_datetime = Column(DateTime, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_car_busy_interval_car_window', 'car_id', 'start_datetime', 'end_datetime'),
+    )
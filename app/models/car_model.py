@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, Enum, ForeignKey, Text
+from sqlalchemy import event, Column, Integer, String, Float, Boolean, Date, DateTime, Enum, ForeignKey, Text, Index
+from sqlalchemy.orm import deferred, undefer_group, object_session
 from datetime import datetime
 from models.base import Base
 
@@ -21,24 +22,28 @@ class Car(Base):
     fuel_type = Column(Enum('petrol', 'cng', 'diesel', 'electric'), nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
+    geohash = Column(String(12), nullable=True, index=True)
     is_visible = Column(Boolean, default=True, nullable=False)
     car_type = Column(Enum('sedan', 'suv', 'hatchback'), nullable=False)  
     transmission_type = Column(Enum('manual', 'automatic'), nullable=False)  
-    future_booking_datetime = Column(Text, nullable=False) 
+    # 'details' group: the rendered bookings and the features list are wide Text
+    # most queries never read; loaded on first access or via CAR_FULL_LOAD
+    future_booking_datetime = deferred(Column(Text, nullable=False), group='details')
 
 
-    front_view_image_url = Column(Text, nullable=True)
-    rear_view_image_url = Column(Text, nullable=True)
-    left_side_image_url = Column(Text, nullable=True)
-    right_side_image_url = Column(Text, nullable=True)
+    # 'images' group: Cloudinary URLs, only read when a whole car is serialized
+    front_view_image_url = deferred(Column(Text, nullable=True), group='images')
+    rear_view_image_url = deferred(Column(Text, nullable=True), group='images')
+    left_side_image_url = deferred(Column(Text, nullable=True), group='images')
+    right_side_image_url = deferred(Column(Text, nullable=True), group='images')
 
-    features = Column(Text, nullable=False)
+    features = deferred(Column(Text, nullable=False), group='details')
 
-    puc_image_url = Column(Text, nullable=False)
+    puc_image_url = deferred(Column(Text, nullable=False), group='images')
     puc_expiry_date = Column(Date, nullable=False)
-    rc_image_url = Column(Text, nullable=False)
+    rc_image_url = deferred(Column(Text, nullable=False), group='images')
     rc_expiry_date = Column(Date, nullable=False)
-    insurance_image_url = Column(Text, nullable=False)
+    insurance_image_url = deferred(Column(Text, nullable=False), group='images')
     insurance_expiry_date = Column(Date, nullable=False)
 
     cancellations = Column(Integer, default=0, nullable=False)
@@ -49,3 +54,21 @@ class Car(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Bumped on every update; updated_at has one-second precision, so ETags need this too
+    version = Column(Integer, default=0, server_default='0', nullable=False)
+
+    __table_args__ = (
+        Index('ix_car_search_geo', 'is_visible', 'verification_status', 'geohash'),
+        Index('ix_car_search_filters', 'is_visible', 'verification_status', 'car_type', 'fuel_type'),
+        Index('ix_car_updated_at', 'updated_at'),   # catalog sync polls updated_at >= watermark
+    )
+
+
+# Loader options for queries that serialize whole cars (CarOut, full search results)
+CAR_FULL_LOAD = (undefer_group('images'), undefer_group('details'))
+
+
+@event.listens_for(Car, "before_update")
+def _bump_version(mapper, connection, target):
+    if object_session(target).is_modified(target, include_collections=False):
+        target.version = Car.version + 1
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime
+from datetime import datetime
+from models.base import Base
+
+class DailyRollupDelta(Base):
+    # Appended by every tracked write; folded into daily_rollup when rollups are read or rebuilt
+    __tablename__ = 'daily_rollup_delta'
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    metric = Column(String(64), nullable=False)
+    value = Column(Float(precision=53), nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Float, Date, DateTime
+from datetime import datetime
+from models.base import Base
+
+class DailyRollup(Base):
+    __tablename__ = 'daily_rollup'
+
+    # Primary key order serves "metrics for a date range" scans
+    day = Column(Date, primary_key=True)
+    metric = Column(String(64), primary_key=True)
+    value = Column(Float(precision=53), nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
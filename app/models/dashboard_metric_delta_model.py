@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from datetime import datetime
+from models.base import Base
+
+class DashboardMetricDelta(Base):
+    # Appended by every tracked write; folded into dashboard_metric when the summary is read
+    __tablename__ = 'dashboard_metric_delta'
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String(64), nullable=False)
+    value = Column(Float(precision=53), nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Float, DateTime
+from datetime import datetime
+from models.base import Base
+
+class DashboardMetric(Base):
+    __tablename__ = 'dashboard_metric'
+
+    key = Column(String(64), primary_key=True)
+    value = Column(Float(precision=53), nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, UniqueConstraint
+from datetime import datetime
+from models.base import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_key'
+
+    id = Column(Integer, primary_key=True)
+    scope = Column(String(64), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+
+    status = Column(Enum('in_progress', 'completed'), default='in_progress', nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint('scope', 'key', name='uq_idempotency_scope_key'),
+    )
@@ -9,7 +9,7 @@ class Refund(Base):
     user_id = Column(Integer, ForeignKey('user.id'), nullable=False)             
     booking_id = Column(Integer, ForeignKey('booking.id'), nullable=False)
     
-    reason = Column(Enum('cancelled_by_user', 'refundable', 'cancelled_by_owner'), nullable=False)
+    reason = Column(Enum('cancelled_by_user', 'refundable', 'cancelled_by_owner', 'cancelled_by_system'), nullable=False)
 
     deduction_amount = Column(Float, default=0)
     deduction_reason = Column(Text, nullable=True)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from models.base import Base
+
+class SchedulerLease(Base):
+    __tablename__ = 'scheduler_lease'
+
+    name = Column(String(64), primary_key=True)
+    holder = Column(String(128), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    # Transitions due at or before this time have been handled
+    watermark = Column(DateTime, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
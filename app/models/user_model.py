@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey
+from sqlalchemy import event, Column, Integer, String, Text, DateTime, Enum, ForeignKey
+from sqlalchemy.orm import object_session
 from datetime import datetime
 from models.base import Base
 
@@ -21,4 +22,11 @@ class User(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped on every update; updated_at has one-second precision, so ETags need this too
+    version = Column(Integer, default=0, server_default='0', nullable=False)
 
+
+@event.listens_for(User, "before_update")
+def _bump_version(mapper, connection, target):
+    if object_session(target).is_modified(target, include_collections=False):
+        target.version = User.version + 1
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, Enum, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Text, Enum, ForeignKey, DateTime, Index
 from datetime import datetime
 from models.base import Base
 
@@ -15,5 +15,13 @@ class UserVerification(Base):
     verifier_id = Column(Integer, ForeignKey('user.id'), nullable=True) 
     rejection_reason = Column(Text, nullable=True)
 
+    # Work-queue lease: the reviewer holding the item and until when
+    claimed_by = Column(Integer, ForeignKey('user.id'), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_user_verification_status_created', 'status', 'created_at'),
+    )
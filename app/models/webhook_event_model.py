@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
+from datetime import datetime
+from models.base import Base
+
+class WebhookEvent(Base):
+    __tablename__ = 'webhook_event'
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String(32), nullable=False, default='razorpay')
+    event_id = Column(String(64), nullable=True, unique=True)  # delivery id, so redeliveries are stored once
+    event = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)
+
+    status = Column(Enum('pending', 'processed', 'failed'), default='pending', nullable=False)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_webhook_event_queue', 'status', 'id'),
+    )
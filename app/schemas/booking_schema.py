@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Literal
 
 class BookingRequest(BaseModel):
     user_id: int
@@ -13,14 +13,27 @@ class BookingRequest(BaseModel):
     latitude: Optional[float] = None
     longitude: Optional[float] = None
 
-    price_per_hour: float
-    total_hours: float
-    security_deposit: float
+    # Amounts are priced server-side (utils.pricing); client values are ignored
+    price_per_hour: Optional[float] = None
+    total_hours: Optional[float] = None
+    security_deposit: Optional[float] = None
     coupon_discount: Optional[float] = None
     coupon_id: Optional[int] = None
     razorpay_payment_id: Optional[str] = None
 
 
+class BookingCarSummary(BaseModel):
+    id: int
+    company_name: str
+    model_name: str
+    car_number: str
+    car_type: str
+    fuel_type: str
+    transmission_type: str
+    location: str
+    front_view_image_url: Optional[str] = None
+
+
 class MyBookingOut(BaseModel):
     id: int
     user_id: int
@@ -36,12 +49,14 @@ class MyBookingOut(BaseModel):
 
     picked_time: Optional[datetime] = None
     returned_time: Optional[datetime] = None
+    overdue_at: Optional[datetime] = None
 
     price_per_hour: float
     total_hours: float
     security_deposit: float
     coupon_discount: Optional[float] = None
     created_at: datetime
+    car: Optional[BookingCarSummary] = None
 
 
 class MyCarBookingOut(BaseModel):
@@ -59,6 +74,7 @@ class MyCarBookingOut(BaseModel):
  
     picked_time: Optional[datetime] = None
     returned_time: Optional[datetime] = None
+    overdue_at: Optional[datetime] = None
     
     pickup_otp: str
     drop_otp: str
@@ -68,6 +84,7 @@ class MyCarBookingOut(BaseModel):
     security_deposit: float
     coupon_discount: Optional[float] = None
     created_at: datetime
+    car: Optional[BookingCarSummary] = None
 
 
 
@@ -101,7 +118,12 @@ class BookingCancellation(BaseModel):
 
 # Request model for Razorpay order creation
 class RazorpayOrderRequest(BaseModel):
-    amount: float  # Amount in paise (1 INR = 100 paise)
+    # The order is priced server-side from the booking it pays for (utils.pricing)
+    car_id: int
+    start_datetime: datetime
+    end_datetime: datetime
+    coupon_id: Optional[int] = None
+    amount: Optional[float] = None  # ignored
     currency: str = "INR"
     receipt: Optional[str] = None
     notes: Optional[dict] = None
@@ -110,4 +132,58 @@ class RazorpayOrderRequest(BaseModel):
 class PaymentVerificationRequest(BaseModel):
     razorpay_order_id: str
     razorpay_payment_id: str
-    razorpay_signature: str
\ No newline at end of file
+    razorpay_signature: str
+
+class SettlementItem(BaseModel):
+    booking_id: int
+    kind: Literal['drop', 'cancel', 'owner_cancel']
+    refund_percentage: Optional[float] = None   # cancel only
+    returned_time: Optional[datetime] = None    # drop only, defaults to now
+
+class SettlementBatchRequest(BaseModel):
+    items: List[SettlementItem] = Field(..., min_length=1, max_length=5000)
+
+class SettlementItemResult(BaseModel):
+    booking_id: int
+    status: Literal['settled', 'failed']
+    message: Optional[str] = None
+
+class SettlementBatchResponse(BaseModel):
+    results: List[SettlementItemResult]
+    settled: int
+    failed: int
+
+class QuoteWindow(BaseModel):
+    start_datetime: datetime
+    end_datetime: datetime
+
+class QuoteRequest(BaseModel):
+    car_ids: List[int] = Field(..., min_length=1, max_length=200)
+    windows: List[QuoteWindow] = Field(..., min_length=1, max_length=20)
+    coupon_id: Optional[int] = None
+
+class WindowQuote(BaseModel):
+    start_datetime: datetime
+    end_datetime: datetime
+    total_hours: float
+    rent: float
+    coupon_amount: float
+    total_amount: float
+    available: bool
+
+class LateFeeSchedule(BaseModel):
+    grace_hours: float
+    late_fee_per_hour: float
+    deposit_covers_hours: Optional[int] = None
+
+class CarQuote(BaseModel):
+    car_id: int
+    price_per_hour: float
+    security_deposit: float
+    coupon_discount: float
+    late_fees: LateFeeSchedule
+    windows: List[WindowQuote]
+
+class QuoteResponse(BaseModel):
+    quotes: List[CarQuote]
+    missing_car_ids: List[int]
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
-from typing import Optional, Literal
+from typing import Optional, Literal, List
 from datetime import date, datetime
 
 class CarVerificationRequest(BaseModel):
@@ -38,6 +38,24 @@ class CarVerificationRequest(BaseModel):
         orm_mode = True
 
 
+class CarBulkVerificationRequest(BaseModel):
+    cars: List[CarVerificationRequest] = Field(min_length=1, max_length=1000)
+
+
+class CarBulkItemResult(BaseModel):
+    index: int
+    car_id: Optional[int] = None
+    status: Literal['created', 'updated', 'failed']
+    message: str
+
+
+class CarBulkVerificationResponse(BaseModel):
+    results: List[CarBulkItemResult]
+    created: int
+    updated: int
+    failed: int
+
+
 class CarOut(BaseModel):
     id: int 
     owner_id: int 
@@ -105,6 +123,9 @@ class CarSearchRequest(BaseModel):
     fuelType: Optional[str] = None
     minRating: Optional[float] = None
     sortBy: Optional[str] = "nearest" 
+    limit: int = Field(default=20, ge=1, le=100)
+    cursor: Optional[str] = None
+    fields: Literal['listing', 'full'] = 'listing'
 
     class Config:
         from_attributes = True
@@ -152,4 +173,26 @@ class CarSearchResponse(BaseModel):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class CarListingResponse(BaseModel):
+    id: int
+    owner_id: int
+    distance: Optional[float] = None
+    company_name: str
+    model_name: str
+    manufacture_year: int
+    price_per_hour: float
+    car_rating: float
+    no_of_car_rating: float
+    location: str
+    fuel_type: Literal['petrol', 'cng', 'diesel', 'electric']
+    car_type: str
+    transmission_type: str
+    latitude: float
+    longitude: float
+    front_view_image_url: str
+
+    class Config:
+        from_attributes = True
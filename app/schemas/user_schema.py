@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List
 from datetime import datetime, date
+from config import VERIFICATION_CLAIM_LIMIT
 class VerificationCheckRequest(BaseModel):
     user_id: int
 
@@ -118,6 +119,8 @@ class UserVerificationOut(BaseModel):
     user_id: int
     license_photo_url: str
     passport_photo_url: str
+    claimed_by: Optional[int] = None
+    lease_expires_at: Optional[datetime] = None
     
     created_at: datetime
     updated_at: datetime
@@ -125,6 +128,8 @@ class UserVerificationOut(BaseModel):
 class CarVerificationOut(BaseModel):
     id: int
     car_id: Optional[int]
+    claimed_by: Optional[int] = None
+    lease_expires_at: Optional[datetime] = None
 
     created_at: datetime
     updated_at: datetime
@@ -133,6 +138,16 @@ class CarVerificationOut(BaseModel):
         orm_mode = True
 
 
+class VerificationClaimRequest(BaseModel):
+    reviewer_id: int
+    limit: int = Field(default=10, ge=1, le=VERIFICATION_CLAIM_LIMIT)
+
+
+class VerificationReleaseRequest(BaseModel):
+    reviewer_id: int
+    verification_ids: List[int] = Field(..., min_length=1, max_length=VERIFICATION_CLAIM_LIMIT)
+
+
 class RefundClaimIn(BaseModel):
     refund_id: int
     upi_id: str 
@@ -0,0 +1,83 @@
+import importlib
+import os
+import sys
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# config.py reads these at import; the suite itself runs on an in-memory SQLite database
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("RAZORPAY_KEY_ID", "rzp_test_key")
+os.environ.setdefault("RAZORPAY_KEY_SECRET", "rzp_test_secret")
+os.environ.setdefault("RAZORPAY_WEBHOOK_SECRET", "rzp_test_webhook_secret")
+os.environ.setdefault("SECURITY_DEPOSIT", "2000")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+import database
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+database.engine = engine
+database.SessionLocal.configure(bind=engine)
+
+from models.base import Base
+for module_name in sorted(os.listdir(os.path.join(APP_DIR, "models"))):
+    if module_name.endswith("_model.py"):
+        importlib.import_module(f"models.{module_name[:-3]}")
+from models.user_model import User
+from models.car_model import Car
+from api.v1.router import user_router, otp_router, car_router, boooking_router, employee_router, admin_router, webhook_router
+from utils.search_cache import search_cache
+from utils.car_catalog import car_catalog
+from utils.booking_scheduler import booking_scheduler
+from factories import CAR_POSITIONS, car_payload
+
+app = FastAPI()
+for module in (user_router, otp_router, car_router, boooking_router, employee_router, admin_router, webhook_router):
+    app.include_router(module.router, prefix="/api/v1")
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    # Process-wide singletons start empty for every test
+    search_cache.__init__()
+    car_catalog.__init__()
+    booking_scheduler.__init__()
+    yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def cars(client, db):
+    """An owner (id 1), a renter (id 2) and five approved cars; returns the car ids."""
+    db.add_all([User(id=1, mobile_number="9000000001", user_type="owner"), User(id=2, mobile_number="9000000002")])
+    db.commit()
+    car_ids = []
+    for index, (latitude, longitude, price) in enumerate(CAR_POSITIONS):
+        response = client.post("/api/v1/car-verification", json=car_payload(
+            car_number=f"MH{index}", latitude=latitude, longitude=longitude, price_per_hour=price
+        ))
+        assert response.status_code == 200, response.text
+        car_ids.append(response.json()["car_id"])
+    db.query(Car).update({"verification_status": "approved"})
+    db.commit()
+    return car_ids
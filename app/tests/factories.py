@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+# (latitude, longitude, price_per_hour) of the cars seeded by the `cars` fixture
+CAR_POSITIONS = [(18.52, 73.85, 100), (18.53, 73.86, 80), (18.60, 73.90, 120), (19.5, 73.9, 50), (28.6, 77.2, 90)]
+
+
+def car_payload(**overrides):
+    today = str(date.today())
+    payload = dict(
+        owner_id=1, company_name="Maruti", model_name="Swift", car_number="MH12", manufacture_year=2020,
+        purchase_type="new", ownership_count=1, price_per_hour=100.0, location="Pune", fuel_type="petrol",
+        features="ac", car_type="hatchback", transmission_type="manual", front_view_image_url="front",
+        rear_view_image_url="rear", left_side_image_url="left", right_side_image_url="right",
+        last_serviced_on=today, puc_image_url="puc", puc_expiry_date=today, rc_image_url="rc",
+        rc_expiry_date=today, insurance_image_url="insurance", insurance_expiry_date=today,
+        future_booking_datetime="", latitude=18.52, longitude=73.85, is_visible=True,
+    )
+    payload.update(overrides)
+    return payload
+
+
+def book(db, car_id, start, hours=3):
+    """Book `car_id` for renter 2 through the real reservation path; returns the booking id."""
+    from schemas.booking_schema import BookingRequest
+    from api.v1.router.boooking_router import _reserve_booking
+
+    payload = BookingRequest(
+        user_id=2, car_id=car_id, car_owner_id=1, pickup_delivery_location="Pune",
+        start_datetime=start, end_datetime=start + timedelta(hours=hours),
+    )
+    return _reserve_booking(payload, "paid", db)["booking_id"]
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from models.booking_model import Booking
+from models.refund_model import Refund
+from factories import book
+from utils.booking_scheduler import booking_scheduler, NO_SHOW_GRACE
+
+
+def test_no_show_is_cancelled_and_refunded_in_full(cars, db):
+    now = datetime.utcnow().replace(microsecond=0)
+    booking_id = book(db, cars[0], now - NO_SHOW_GRACE + timedelta(minutes=1))
+    booking_scheduler.tick(db, now)
+
+    booking_scheduler.tick(db, now + timedelta(minutes=2))
+
+    db.expire_all()
+    assert db.get(Booking, booking_id).status == "cancelled_by_system"
+    refund = db.query(Refund).filter(Refund.booking_id == booking_id).one()
+    assert refund.reason == "cancelled_by_system"
+    # 3 hours at 100/hour plus the 2000 deposit
+    assert refund.refund_amount == 2300
+    assert refund.deduction_amount == 0
+
+
+def test_bookings_due_before_the_first_run_are_left_alone(cars, db):
+    now = datetime.utcnow().replace(microsecond=0)
+    stale_id = book(db, cars[0], now - timedelta(days=30))
+
+    booking_scheduler.tick(db, now)
+    booking_scheduler.tick(db, now + timedelta(hours=1))
+
+    db.expire_all()
+    assert db.get(Booking, stale_id).status == "booked"
+    assert db.query(Refund).count() == 0
+
+
+def test_new_leader_catches_up_on_bookings_due_while_no_one_ran(cars, db):
+    now = datetime.utcnow().replace(microsecond=0)
+    booking_scheduler.tick(db, now)
+    booking_id = book(db, cars[0], now + timedelta(hours=1))
+
+    # A fresh process takes over hours later, long after the booking fell due
+    booking_scheduler.__init__()
+    booking_scheduler.tick(db, now + NO_SHOW_GRACE + timedelta(hours=5))
+
+    db.expire_all()
+    assert db.get(Booking, booking_id).status == "cancelled_by_system"
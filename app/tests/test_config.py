@@ -0,0 +1,11 @@
+import config
+
+
+def test_missing_security_deposit_is_reported(monkeypatch):
+    monkeypatch.setattr(config, "SECURITY_DEPOSIT", None)
+
+    assert config.missing_settings() == ["SECURITY_DEPOSIT"]
+
+
+def test_configured_settings_are_not_reported():
+    assert config.missing_settings() == []
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.daily_rollup_delta_model import DailyRollupDelta
+from schemas.booking_schema import SettlementItem
+from factories import book
+from utils.daily_rollup import query_rollups, rebuild_rollups
+from utils.settlement import settle_batch
+
+
+def _series(db, day):
+    return [
+        {key: pytest.approx(value) for key, value in row.items()}
+        for row in query_rollups(db, day - timedelta(days=1), day + timedelta(days=1), "day")
+    ]
+
+
+def test_incremental_rollups_match_rebuild(cars, db):
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+    booking_ids = [book(db, car_id, start) for car_id in cars[:3]]
+    settle_batch(db, [
+        SettlementItem(booking_id=booking_id, kind=kind, refund_percentage=50, returned_time=start + timedelta(hours=6))
+        for booking_id, kind in zip(booking_ids, ["drop", "cancel", "owner_cancel"])
+    ])
+    today = datetime.utcnow().date()
+    assert db.query(DailyRollupDelta).count() > 0
+
+    incremental = _series(db, today)
+    assert db.query(DailyRollupDelta).count() == 0
+    assert incremental[1]["bookings.count"] == 3
+    assert incremental[1]["refunds.count"] == 3
+
+    rebuild_rollups(db, today - timedelta(days=1), today + timedelta(days=1))
+    assert _series(db, today) == incremental
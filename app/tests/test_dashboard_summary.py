@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.dashboard_metric_delta_model import DashboardMetricDelta
+from schemas.booking_schema import SettlementItem
+from factories import book
+from utils.dashboard_summary import read_summary, rebuild_summary, REBUILT_AT_KEY
+from utils.settlement import settle_batch
+
+
+def _counters(metrics):
+    return {key: pytest.approx(value) for key, value in metrics.items() if key != REBUILT_AT_KEY and value}
+
+
+def _book_and_settle(db, car_ids):
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+    booking_ids = [book(db, car_id, start) for car_id in car_ids]
+    # One of each settlement, so refunds, penalties, payouts and coupons are all written
+    kinds = ["drop", "cancel", "owner_cancel"]
+    settle_batch(db, [
+        SettlementItem(booking_id=booking_id, kind=kind, refund_percentage=50, returned_time=start + timedelta(hours=6))
+        for booking_id, kind in zip(booking_ids, kinds)
+    ])
+
+
+def test_incremental_counters_match_rebuild(cars, db):
+    rebuild_summary(db)
+    _book_and_settle(db, cars[:4])
+
+    incremental = read_summary(db)
+
+    assert db.query(DashboardMetricDelta).count() == 0
+    assert incremental["bookings.count"] == 4
+    assert _counters(incremental) == _counters(rebuild_summary(db))
+
+
+def test_first_read_rebuilds_and_later_writes_are_folded(cars, db):
+    _book_and_settle(db, cars[:3])
+    first = read_summary(db)
+    assert REBUILT_AT_KEY in first
+
+    _book_and_settle(db, cars[3:5])
+    assert db.query(DashboardMetricDelta).count() > 0
+
+    assert _counters(read_summary(db)) == _counters(rebuild_summary(db))
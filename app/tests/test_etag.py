@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from models.user_model import User
+
+# MySQL DATETIME keeps whole seconds; SQLite would keep the microseconds that tell the edits apart
+SAME_SECOND = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _truncate_updated_at(db):
+    db.query(User).update({"updated_at": SAME_SECOND}, synchronize_session=False)
+    db.commit()
+
+
+def test_user_etag_changes_on_edits_within_the_same_second(client, db):
+    db.add(User(id=7, mobile_number="9000000007"))
+    db.commit()
+
+    etags = []
+    for name in ("Asha", "Ravi"):
+        assert client.post("/api/v1/user/update-name", json={"user_id": 7, "full_name": name}).status_code == 200
+        _truncate_updated_at(db)
+        etags.append(client.get("/api/v1/user/7").headers["etag"])
+
+    assert etags[0] != etags[1]
+    assert client.get("/api/v1/user/7", headers={"If-None-Match": etags[1]}).status_code == 304
+
+
+def test_unchanged_write_keeps_the_user_etag(client, db):
+    db.add(User(id=7, mobile_number="9000000007", full_name="Asha"))
+    db.commit()
+    _truncate_updated_at(db)
+    before = client.get("/api/v1/user/7").headers["etag"]
+
+    client.post("/api/v1/user/update-name", json={"user_id": 7, "full_name": "Asha"})
+
+    assert client.get("/api/v1/user/7").headers["etag"] == before
@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from models.booking_model import Booking
+from utils.payment_gateway import RazorpayGateway, PaymentGatewayError, razorpay_gateway, verify_signature
+
+
+def _gateway(handler):
+    gateway = RazorpayGateway(base_url="https://razorpay.test/v1", key_id="rzp_test_key", key_secret="rzp_test_secret")
+    gateway._client = httpx.AsyncClient(base_url=gateway.base_url, auth=gateway.auth, transport=httpx.MockTransport(handler))
+    return gateway
+
+
+@pytest.fixture
+def fake_razorpay():
+    """Routes the shared gateway to `handler` for one test."""
+    def install(handler):
+        razorpay_gateway._client = httpx.AsyncClient(base_url="https://razorpay.test/v1", transport=httpx.MockTransport(handler))
+    yield install
+    razorpay_gateway._client = None
+
+
+def test_fetch_payment_returns_the_payment_json():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"id": "pay_1", "status": "captured"})
+
+    payment = asyncio.run(_gateway(handler).fetch_payment("pay_1"))
+
+    assert payment == {"id": "pay_1", "status": "captured"}
+    assert requests[0].method == "GET"
+    assert requests[0].url.path == "/v1/payments/pay_1"
+    assert requests[0].headers["authorization"].startswith("Basic ")
+
+
+@pytest.mark.parametrize("failure, message", [
+    (httpx.ReadTimeout("read timed out"), "timed out"),
+    (httpx.ConnectTimeout("connect timed out"), "timed out"),
+    (httpx.ConnectError("connection refused"), "failed: connection refused"),
+])
+def test_transport_failures_become_gateway_errors(failure, message):
+    def handler(request):
+        raise failure
+
+    with pytest.raises(PaymentGatewayError, match=message):
+        asyncio.run(_gateway(handler).fetch_payment("pay_1"))
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 404, 502])
+def test_error_statuses_become_gateway_errors(status_code):
+    def handler(request):
+        return httpx.Response(status_code, json={"error": {"code": "BAD_REQUEST_ERROR"}})
+
+    with pytest.raises(PaymentGatewayError, match=f"failed with {status_code}"):
+        asyncio.run(_gateway(handler).create_order({"amount": 100, "currency": "INR"}))
+
+
+def test_verify_signature():
+    signature = hmac.new(b"rzp_test_secret", b"order_1|pay_1", hashlib.sha256).hexdigest()
+
+    assert verify_signature("order_1|pay_1", signature, "rzp_test_secret")
+    assert not verify_signature("order_1|pay_2", signature, "rzp_test_secret")
+
+
+def test_verify_payment_maps_gateway_failure_to_500(client, fake_razorpay):
+    fake_razorpay(lambda request: httpx.Response(503, text="unavailable"))
+    signature = hmac.new(b"rzp_test_secret", b"order_1|pay_1", hashlib.sha256).hexdigest()
+
+    response = client.post("/api/v1/booking/verify-payment", json={
+        "razorpay_order_id": "order_1", "razorpay_payment_id": "pay_1", "razorpay_signature": signature,
+    })
+
+    assert response.status_code == 500
+    assert "failed with 503" in response.json()["detail"]
+
+
+def test_verify_payment_rejects_uncaptured_payment(client, fake_razorpay):
+    fake_razorpay(lambda request: httpx.Response(200, json={"id": "pay_1", "status": "failed"}))
+    signature = hmac.new(b"rzp_test_secret", b"order_1|pay_1", hashlib.sha256).hexdigest()
+
+    response = client.post("/api/v1/booking/verify-payment", json={
+        "razorpay_order_id": "order_1", "razorpay_payment_id": "pay_1", "razorpay_signature": signature,
+    })
+
+    assert response.status_code == 400
+
+
+def test_verify_payment_rejects_bad_signature_without_calling_razorpay(client, fake_razorpay):
+    calls = []
+    fake_razorpay(lambda request: calls.append(request) or httpx.Response(200, json={"status": "captured"}))
+
+    response = client.post("/api/v1/booking/verify-payment", json={
+        "razorpay_order_id": "order_1", "razorpay_payment_id": "pay_1", "razorpay_signature": "forged",
+    })
+
+    assert response.status_code == 400
+    assert calls == []
+
+
+def _booking_window():
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=2)
+    return start, start + timedelta(hours=3)
+
+
+def test_order_amount_is_priced_on_the_server(client, cars, fake_razorpay):
+    orders = []
+
+    def handler(request):
+        orders.append(json.loads(request.content))
+        return httpx.Response(200, json={"id": "order_1", "amount": orders[-1]["amount"]})
+
+    fake_razorpay(handler)
+    start, end = _booking_window()
+
+    response = client.post("/api/v1/booking/create-razorpay-order", json={
+        "car_id": cars[0], "start_datetime": start.isoformat(), "end_datetime": end.isoformat(), "amount": 100,
+    })
+
+    assert response.status_code == 200, response.text
+    # 3 hours at 100/hour plus the 2000 deposit, in paise; the client's amount is ignored
+    assert orders[0]["amount"] == 230000
+
+
+def test_booking_rejects_payment_for_a_different_amount(client, cars, db, fake_razorpay):
+    fake_razorpay(lambda request: httpx.Response(200, json={"id": "pay_1", "status": "captured", "amount": 100}))
+    start, end = _booking_window()
+
+    response = client.post("/api/v1/booking/booking", json={
+        "user_id": 2, "car_id": cars[0], "car_owner_id": 1, "pickup_delivery_location": "Pune",
+        "start_datetime": start.isoformat(), "end_datetime": end.isoformat(), "razorpay_payment_id": "pay_1",
+    })
+
+    assert response.status_code == 400
+    assert db.query(Booking).count() == 0
+
+
+def test_booking_accepts_payment_of_the_quoted_total(client, cars, db, fake_razorpay):
+    fake_razorpay(lambda request: httpx.Response(200, json={"id": "pay_1", "status": "captured", "amount": 230000}))
+    start, end = _booking_window()
+
+    response = client.post("/api/v1/booking/booking", json={
+        "user_id": 2, "car_id": cars[0], "car_owner_id": 1, "pickup_delivery_location": "Pune",
+        "start_datetime": start.isoformat(), "end_datetime": end.isoformat(), "razorpay_payment_id": "pay_1",
+    })
+
+    assert response.status_code == 200, response.text
+    assert response.json()["quote"]["total_amount"] == 2300
+    assert db.query(Booking).count() == 1
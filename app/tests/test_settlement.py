@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from models.booking_model import Booking
+from models.refund_model import Refund
+from models.penalty_model import Penalty
+from models.payout_model import Payout
+from models.coupon_model import Coupon
+from factories import book
+
+
+def _booking(db, cars):
+    return book(db, cars[0], datetime.utcnow().replace(microsecond=0) + timedelta(days=1))
+
+
+def test_repeated_drop_is_rejected_and_settles_once(client, cars, db):
+    booking_id = _booking(db, cars)
+    otp = db.get(Booking, booking_id).drop_otp
+
+    first = client.post("/api/v1/booking/drop", json={"booking_id": booking_id, "otp": otp})
+    second = client.post("/api/v1/booking/drop", json={"booking_id": booking_id, "otp": otp})
+
+    assert first.status_code == 200, first.text
+    assert second.status_code == 409
+    assert db.query(Refund).count() == 1
+    assert db.query(Payout).count() == 1
+
+
+def test_repeated_owner_cancel_is_rejected_and_settles_once(client, cars, db):
+    booking_id = _booking(db, cars)
+
+    first = client.post("/api/v1/booking/cancel-by-owner", json={"booking_id": booking_id, "owner_id": 1})
+    second = client.post("/api/v1/booking/cancel-by-owner", json={"booking_id": booking_id, "owner_id": 1})
+
+    assert first.status_code == 200, first.text
+    assert second.status_code == 409
+    assert db.query(Refund).count() == 1
+    assert db.query(Penalty).count() == 1
+    assert db.query(Coupon).count() == 1
+
+
+def test_drop_after_owner_cancel_is_rejected(client, cars, db):
+    booking_id = _booking(db, cars)
+    otp = db.get(Booking, booking_id).drop_otp
+    client.post("/api/v1/booking/cancel-by-owner", json={"booking_id": booking_id, "owner_id": 1})
+
+    response = client.post("/api/v1/booking/drop", json={"booking_id": booking_id, "otp": otp})
+
+    assert response.status_code == 409
+    assert db.query(Payout).count() == 0
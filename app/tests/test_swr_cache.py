@@ -0,0 +1,89 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.swr_cache import StaleWhileRevalidateCache
+
+READERS = 16
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_concurrent_cold_reads_compute_once():
+    calls = []
+
+    def compute(db):
+        calls.append(1)
+        time.sleep(0.05)
+        return len(calls)
+
+    cache = StaleWhileRevalidateCache(compute, ttl_seconds=60, name="test-cache")
+    with ThreadPoolExecutor(max_workers=READERS) as pool:
+        values = [value for value, _ in pool.map(lambda _: cache.get(), range(READERS))]
+
+    assert calls == [1]
+    assert values == [1] * READERS
+
+
+def test_stale_reads_start_a_single_refresh_and_serve_the_old_value():
+    release = threading.Event()
+    calls = []
+
+    def compute(db):
+        calls.append(1)
+        if len(calls) > 1:
+            release.wait(5)
+        return len(calls)
+
+    cache = StaleWhileRevalidateCache(compute, ttl_seconds=60, name="test-cache")
+    cache.get()
+    cache.ttl_seconds = 0
+
+    gate = threading.Barrier(READERS)
+
+    def read(_):
+        gate.wait()
+        return cache.get()
+
+    with ThreadPoolExecutor(max_workers=READERS) as pool:
+        results = list(pool.map(read, range(READERS)))
+
+    # Every stale reader got the previous value at once; only one refresh is running
+    assert [value for value, _ in results] == [1] * READERS
+    assert all(metadata["stale"] for _, metadata in results)
+    assert len(calls) == 2
+
+    release.set()
+    _wait_for(lambda: not cache._refreshing)
+    assert cache.get()[0] == 2
+
+
+def test_failed_refresh_keeps_the_old_value_and_is_retried():
+    failing = threading.Event()
+    calls = []
+
+    def compute(db):
+        calls.append(1)
+        if failing.is_set():
+            raise RuntimeError("database unavailable")
+        return "fresh" if len(calls) > 1 else "initial"
+
+    cache = StaleWhileRevalidateCache(compute, ttl_seconds=60, name="test-cache")
+    cache.get()
+    failing.set()
+    cache.ttl_seconds = 0
+
+    assert cache.get()[0] == "initial"
+    _wait_for(lambda: not cache._refreshing)
+    failing.clear()
+
+    # The failed refresh left the old value; this stale read retries
+    assert cache.get()[0] == "initial"
+    _wait_for(lambda: not cache._refreshing)
+    assert len(calls) == 3
+    assert cache.get()[0] == "fresh"
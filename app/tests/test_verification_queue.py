@@ -0,0 +1,28 @@
+from sqlalchemy import event
+
+import database
+from models.user_model import User
+from models.user_verification_model import UserVerification
+
+
+def test_claim_issues_no_select_per_claimed_item(client, db):
+    db.add(User(id=9, mobile_number="9000000009", user_type="employee"))
+    db.add_all([User(id=user_id, mobile_number=f"90000001{user_id:02d}") for user_id in range(10, 15)])
+    db.add_all([UserVerification(user_id=user_id, license_photo_url="license", passport_photo_url="passport") for user_id in range(10, 15)])
+    db.commit()
+
+    selects = []
+
+    def count_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", count_selects)
+    try:
+        response = client.post("/api/v1/employee/user-verifications/claim", json={"reviewer_id": 9, "limit": 5})
+    finally:
+        event.remove(database.engine, "before_cursor_execute", count_selects)
+
+    assert response.status_code == 200, response.text
+    assert [item["claimed_by"] for item in response.json()] == [9] * 5
+    assert len(selects) == 1
@@ -0,0 +1,108 @@
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+from models.car_model import Car
+from models.car_busy_interval_model import CarBusyInterval
+
+
+class IntervalTree:
+    """
+    Static interval tree over half-open [start, end) intervals.
+
+    Items are (start, end, value) tuples kept in an implicit balanced BST
+    sorted by start, where every node also stores the largest end in its
+    subtree so non-overlapping branches are skipped.
+    """
+
+    def __init__(self, intervals):
+        self._items = sorted(intervals, key=lambda item: item[0])
+        self._max_end = [None] * len(self._items)
+        self._build(0, len(self._items) - 1)
+
+    def _build(self, lo, hi):
+        if lo > hi:
+            return None
+        mid = (lo + hi) // 2
+        max_end = self._items[mid][1]
+        for child_end in (self._build(lo, mid - 1), self._build(mid + 1, hi)):
+            if child_end is not None and child_end > max_end:
+                max_end = child_end
+        self._max_end[mid] = max_end
+        return max_end
+
+    def overlapping(self, start, end):
+        found = []
+        self._search(0, len(self._items) - 1, start, end, found)
+        return found
+
+    def overlaps(self, start, end):
+        return bool(self.overlapping(start, end))
+
+    def _search(self, lo, hi, start, end, found):
+        if lo > hi:
+            return
+        mid = (lo + hi) // 2
+        if self._max_end[mid] <= start:
+            return
+        self._search(lo, mid - 1, start, end, found)
+        item = self._items[mid]
+        if item[0] < end:
+            if item[1] > start:
+                found.append(item)
+            self._search(mid + 1, hi, start, end, found)
+
+
+def car_is_free(start, end):
+    # SQL predicate on Car: no busy interval of the car overlaps [start, end)
+    return ~exists().where(
+        CarBusyInterval.car_id == Car.id,
+        CarBusyInterval.start_datetime < end,
+        CarBusyInterval.end_datetime > start,
+    )
+
+
+def load_interval_tree(db: Session, car_id: int) -> IntervalTree:
+    rows = db.query(
+        CarBusyInterval.start_datetime,
+        CarBusyInterval.end_datetime,
+        CarBusyInterval.booking_id
+    ).filter(CarBusyInterval.car_id == car_id).all()
+    return IntervalTree([tuple(row) for row in rows])
+
+
+def render_future_bookings(db: Session, car_id: int) -> str:
+    # Legacy text view of the busy intervals, still exposed as Car.future_booking_datetime
+    rows = db.query(CarBusyInterval.start_datetime, CarBusyInterval.end_datetime).filter(
+        CarBusyInterval.car_id == car_id
+    ).order_by(CarBusyInterval.start_datetime).all()
+    return " | ".join(f"{start.isoformat()} to {end.isoformat()}" for start, end in rows)
+
+
+def reserve_interval(db: Session, car: Car, booking_id: int, start, end):
+    db.add(CarBusyInterval(
+        car_id=car.id,
+        booking_id=booking_id,
+        start_datetime=start,
+        end_datetime=end
+    ))
+    db.flush()
+    car.future_booking_datetime = render_future_bookings(db, car.id)
+
+
+def release_interval(db: Session, car: Car, booking_id: int):
+    db.query(CarBusyInterval).filter(
+        CarBusyInterval.car_id == car.id,
+        CarBusyInterval.booking_id == booking_id
+    ).delete(synchronize_session=False)
+    car.future_booking_datetime = render_future_bookings(db, car.id)
+
+
+def busy_car_ids(db: Session, car_ids, start, end) -> set:
+    # Subset of car_ids with a busy interval overlapping [start, end)
+    if not car_ids:
+        return set()
+    rows = db.query(CarBusyInterval.car_id).filter(
+        CarBusyInterval.car_id.in_(car_ids),
+        CarBusyInterval.start_datetime < end,
+        CarBusyInterval.end_datetime > start,
+    ).distinct().all()
+    return {car_id for (car_id,) in rows}
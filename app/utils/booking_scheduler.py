@@ -0,0 +1,187 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from config import (
+    BOOKING_SCHEDULER_ENABLED,
+    BOOKING_SCHEDULER_WINDOW_SECONDS,
+    BOOKING_SCHEDULER_TICK_SECONDS,
+    BOOKING_SCHEDULER_LEASE_SECONDS,
+    NO_SHOW_GRACE_MINUTES,
+)
+from database import SessionLocal
+from models.booking_model import Booking
+from models.scheduler_lease_model import SchedulerLease
+from utils.lease import acquire_lease
+from utils.pricing import LATE_GRACE_PERIOD
+from utils.search_cache import invalidate_car
+from utils.settlement import load_settlement_rows, compute_settlement, apply_settlement
+
+NO_SHOW_GRACE = timedelta(minutes=NO_SHOW_GRACE_MINUTES)
+
+LEASE_NAME = "booking-scheduler"
+
+
+class BookingScheduler:
+    """
+    Fires booking lifecycle transitions at their due time:
+
+    - no_show: a `booked` booking not picked up NO_SHOW_GRACE after its start
+      is settled as `system_cancel`: it becomes `cancelled_by_system`, its car
+      interval is released and its payment is refunded.
+    - overdue: a `picked` booking still out LATE_GRACE_PERIOD after its end
+      gets `overdue_at` stamped.
+
+    Only the worker holding the lease runs. It keeps a heap of transitions due
+    within the next window, loaded from the (status, start/end) indexes, and
+    reloads every half window. Both grace periods are longer than the window,
+    so a booking created after a load is always picked up by a later load
+    before it falls due.
+
+    The lease row's watermark records how far transitions have been fired.
+    Only bookings falling due after it are loaded: a new leader catches up
+    on what fell due while nobody held the lease, while rows that were
+    already overdue when the scheduler first ran are left alone.
+    """
+
+    def __init__(self, window_seconds=BOOKING_SCHEDULER_WINDOW_SECONDS, lease_seconds=BOOKING_SCHEDULER_LEASE_SECONDS):
+        self.window = timedelta(seconds=window_seconds)
+        self.lease_seconds = lease_seconds
+        self._heap = []           # (due_at, kind, booking_id)
+        self._scheduled = set()   # (kind, booking_id) currently in the heap
+        self._loaded_at = None
+        self._thread = None
+        self.is_leader = False
+        self.fired = {"no_show": 0, "overdue": 0}
+
+    def _push(self, due_at, kind, booking_id):
+        if (kind, booking_id) in self._scheduled:
+            return
+        self._scheduled.add((kind, booking_id))
+        heapq.heappush(self._heap, (due_at, kind, booking_id))
+
+    def _watermark(self, db: Session, now):
+        lease = db.query(SchedulerLease).filter(SchedulerLease.name == LEASE_NAME).first()
+        if lease.watermark is None:
+            # First run: nothing that fell due before the scheduler existed is touched
+            lease.watermark = now
+            db.commit()
+        return lease.watermark
+
+    def load_window(self, db: Session, now):
+        horizon = now + self.window
+        watermark = self._watermark(db, now)
+
+        no_shows = db.query(Booking.id, Booking.start_datetime).filter(
+            Booking.status == 'booked',
+            Booking.start_datetime > watermark - NO_SHOW_GRACE,
+            Booking.start_datetime < horizon - NO_SHOW_GRACE
+        ).all()
+        for booking_id, start_datetime in no_shows:
+            self._push(start_datetime + NO_SHOW_GRACE, "no_show", booking_id)
+
+        overdue = db.query(Booking.id, Booking.end_datetime).filter(
+            Booking.status == 'picked',
+            Booking.end_datetime > watermark - LATE_GRACE_PERIOD,
+            Booking.end_datetime < horizon - LATE_GRACE_PERIOD,
+            Booking.overdue_at.is_(None)
+        ).all()
+        for booking_id, end_datetime in overdue:
+            self._push(end_datetime + LATE_GRACE_PERIOD, "overdue", booking_id)
+
+        self._loaded_at = now
+
+    def fire_due(self, db: Session, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, kind, booking_id = heapq.heappop(self._heap)
+            self._scheduled.discard((kind, booking_id))
+            due.append((kind, booking_id))
+        if not due:
+            return 0
+
+        rows = load_settlement_rows(db, {booking_id for _, booking_id in due})
+        cars = {}
+        fired = 0
+        for kind, booking_id in due:
+            row = rows.get(booking_id)
+            if row is None:
+                continue
+            booking, payment, car = row
+
+            # Re-check against the locked row: it may have been picked up, dropped or cancelled since loading
+            if kind == "no_show":
+                if booking.status != 'booked' or booking.start_datetime + NO_SHOW_GRACE > now:
+                    continue
+                if payment is None:
+                    print(f"Booking scheduler: no payment for booking {booking.id}, not cancelled")
+                    continue
+                apply_settlement(db, booking, car, compute_settlement("system_cancel", booking, payment, now))
+                if car:
+                    cars[car.id] = car
+            else:
+                if booking.status != 'picked' or booking.overdue_at is not None or booking.end_datetime + LATE_GRACE_PERIOD > now:
+                    continue
+                booking.overdue_at = now
+
+            self.fired[kind] += 1
+            fired += 1
+
+        # Everything due up to now has been handled
+        db.query(SchedulerLease).filter(SchedulerLease.name == LEASE_NAME).update({"watermark": now}, synchronize_session=False)
+        db.commit()
+        for car in cars.values():
+            invalidate_car(car)
+        return fired
+
+    def tick(self, db: Session, now=None):
+        now = now or datetime.utcnow()
+        if not acquire_lease(db, LEASE_NAME, self.lease_seconds):
+            if self.is_leader:
+                # Lost the lease; whoever holds it now loads its own heap
+                self._heap, self._scheduled = [], set()
+                self.is_leader = False
+            return 0
+
+        if not self.is_leader:
+            self.is_leader = True
+            self._loaded_at = None
+        if self._loaded_at is None or now - self._loaded_at >= self.window / 2:
+            self.load_window(db, now)
+        return self.fire_due(db, now)
+
+    def metrics(self):
+        return {
+            "is_leader": self.is_leader,
+            "pending": len(self._heap),
+            "next_due_at": self._heap[0][0] if self._heap else None,
+            "loaded_at": self._loaded_at,
+            "fired": dict(self.fired),
+        }
+
+    def start(self, interval=BOOKING_SCHEDULER_TICK_SECONDS):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="booking-scheduler", daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            db = SessionLocal()
+            try:
+                self.tick(db)
+            except Exception as e:
+                db.rollback()
+                print(f"Booking scheduler tick failed: {str(e)}")
+            finally:
+                db.close()
+            time.sleep(interval)
+
+
+booking_scheduler = BookingScheduler()
+
+
+def start_booking_scheduler():
+    if BOOKING_SCHEDULER_ENABLED:
+        booking_scheduler.start()
@@ -0,0 +1,165 @@
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from config import CAR_CATALOG_ENABLED, CAR_CATALOG_SYNC_SECONDS
+from database import SessionLocal
+from models.car_model import Car, CAR_FULL_LOAD
+from schemas.car_schema import CarOut
+from utils.search_cache import search_cache
+
+# Everything CarOut needs plus the geohash used to bucket records
+CATALOG_FIELDS = tuple(CarOut.model_fields) + ("geohash", "version")
+
+# Records are bucketed by this geohash prefix length (~39km x 20km cells)
+CATALOG_CELL_PRECISION = 4
+
+# Re-read rows this far behind the watermark so commits that land late are not missed
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class CarRecord:
+    __slots__ = CATALOG_FIELDS
+
+    def __init__(self, car):
+        for field in CATALOG_FIELDS:
+            setattr(self, field, getattr(car, field))
+
+    def values(self):
+        return tuple(getattr(self, field) for field in CATALOG_FIELDS)
+
+
+class CarCatalog:
+    """
+    Process-wide snapshot of visible cars.
+
+    Loaded once, then kept fresh by polling for cars whose updated_at is at or
+    after the last sync watermark. Readers get data at most one sync interval
+    (plus query time) old.
+
+    Searches read this snapshot, so a write's own cache invalidation can be
+    followed by a search that re-caches the pre-write state. Every record a
+    sync actually changes therefore invalidates the search cache again, at
+    its old and new position.
+    """
+
+    def __init__(self):
+        self._cars = {}     # car_id -> CarRecord
+        self._cells = {}    # geohash prefix -> set of car ids
+        self._lock = threading.Lock()
+        self._thread = None
+        self.ready = False
+        self.watermark = None
+        self.last_sync_at = None
+
+    def get(self, car_id):
+        return self._cars.get(car_id)
+
+    def in_cells(self, cells):
+        """Records whose geohash starts with any of the given prefixes."""
+        with self._lock:
+            ids = set()
+            for cell in cells:
+                if len(cell) >= CATALOG_CELL_PRECISION:
+                    bucket = self._cells.get(cell[:CATALOG_CELL_PRECISION], ())
+                    ids.update(car_id for car_id in bucket if self._cars[car_id].geohash.startswith(cell))
+                else:
+                    for prefix, bucket in self._cells.items():
+                        if prefix.startswith(cell):
+                            ids.update(bucket)
+            return [self._cars[car_id] for car_id in ids]
+
+    def sync(self, db: Session):
+        query = db.query(Car).options(*CAR_FULL_LOAD)
+        if self.watermark is None:
+            query = query.filter(Car.is_visible == True)
+        else:
+            # Hidden cars are read too so they drop out of the snapshot
+            query = query.filter(Car.updated_at >= self.watermark - SYNC_OVERLAP)
+        changed = query.all()
+
+        moved = []     # positions whose cached search pages may predate this sync
+        with self._lock:
+            initial = not self.ready
+            for car in changed:
+                previous = self._cars.get(car.id)
+                record = CarRecord(car) if car.is_visible and car.geohash else None
+                if previous is None and record is None:
+                    continue
+                if previous is not None and record is not None and previous.values() == record.values():
+                    continue    # re-read through the overlap window, unchanged
+                self._remove(car.id)
+                if record is not None:
+                    self._add(record)
+                if not initial:
+                    moved.extend((snapshot.latitude, snapshot.longitude) for snapshot in (previous, record) if snapshot is not None)
+            if changed:
+                latest = max(car.updated_at for car in changed)
+                if self.watermark is None or latest > self.watermark:
+                    self.watermark = latest
+            elif self.watermark is None:
+                self.watermark = db.query(func.max(Car.updated_at)).scalar() or datetime.utcnow()
+            self.last_sync_at = datetime.utcnow()
+            self.ready = True
+        for latitude, longitude in moved:
+            search_cache.invalidate_point(latitude, longitude)
+        return len(changed)
+
+    def _add(self, record):
+        self._cars[record.id] = record
+        self._cells.setdefault(record.geohash[:CATALOG_CELL_PRECISION], set()).add(record.id)
+
+    def _remove(self, car_id):
+        record = self._cars.pop(car_id, None)
+        if record is None:
+            return
+        cell = record.geohash[:CATALOG_CELL_PRECISION]
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(car_id)
+            if not bucket:
+                del self._cells[cell]
+
+    def metrics(self):
+        with self._lock:
+            records = list(self._cars.values())
+            buckets = len(self._cells)
+        footprint = sum(
+            sys.getsizeof(record) + sum(sys.getsizeof(getattr(record, field)) for field in CATALOG_FIELDS)
+            for record in records
+        )
+        return {
+            "ready": self.ready,
+            "cars": len(records),
+            "cells": buckets,
+            "approx_memory_bytes": footprint,
+            "watermark": self.watermark,
+            "snapshot_lag_seconds": (datetime.utcnow() - self.last_sync_at).total_seconds() if self.last_sync_at else None,
+        }
+
+    def start(self, interval=CAR_CATALOG_SYNC_SECONDS):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="car-catalog-sync", daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            db = SessionLocal()
+            try:
+                self.sync(db)
+            except Exception as e:
+                print(f"Car catalog sync failed: {str(e)}")
+            finally:
+                db.close()
+            time.sleep(interval)
+
+
+car_catalog = CarCatalog()
+
+
+def start_car_catalog():
+    if CAR_CATALOG_ENABLED:
+        car_catalog.start()
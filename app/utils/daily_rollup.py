@@ -0,0 +1,190 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import event, func, insert, delete
+from sqlalchemy.orm import Session
+from models.daily_rollup_model import DailyRollup
+from models.daily_rollup_delta_model import DailyRollupDelta
+from models.user_model import User
+from models.booking_model import Booking
+from models.payment_model import Payment
+from models.refund_model import Refund
+from models.penalty_model import Penalty
+from models.payout_model import Payout
+from utils.dashboard_summary import collect_deltas, rent_amount, lock_summary, delete_deltas
+from utils.upsert import upsert_increment
+
+ROLLUP_METRICS = (
+    "users.new",
+    "bookings.count",
+    "bookings.hours",
+    "bookings.amount",
+    "payments.amount",
+    "refunds.count",
+    "refunds.amount",
+    "penalties.amount",
+    "payouts.amount",
+)
+
+def _day(values):
+    return (values["created_at"] or datetime.utcnow()).date()
+
+
+def _user_metrics(values):
+    # Growth counts renters and owners, not staff accounts
+    if values["user_type"] not in ("user", "owner"):
+        return {}
+    return {(_day(values), "users.new"): 1}
+
+
+def _booking_metrics(values):
+    day = _day(values)
+    return {
+        (day, "bookings.count"): 1,
+        (day, "bookings.hours"): values["total_hours"] or 0,
+        (day, "bookings.amount"): rent_amount(values) + (values["late_charge"] or 0),
+    }
+
+
+# Each row counts towards the day it was created
+TRACKED_MODELS = {
+    User: (("created_at", "user_type"), _user_metrics),
+    Booking: (("created_at", "total_hours", "price_per_hour", "coupon_discount", "late_charge"), _booking_metrics),
+    Payment: (("created_at", "total_hours", "price_per_hour", "coupon_discount"), lambda values: {(_day(values), "payments.amount"): rent_amount(values)}),
+    Refund: (("created_at", "refund_amount"), lambda values: {(_day(values), "refunds.count"): 1, (_day(values), "refunds.amount"): values["refund_amount"] or 0}),
+    Penalty: (("created_at", "penalty_amount"), lambda values: {(_day(values), "penalties.amount"): values["penalty_amount"] or 0}),
+    Payout: (("created_at", "payout_amount"), lambda values: {(_day(values), "payouts.amount"): values["payout_amount"] or 0}),
+}
+
+
+@event.listens_for(Session, "after_flush")
+def _track_daily_rollups(session, flush_context):
+    # Same transaction as the write, and append-only like the dashboard summary:
+    # writers never wait on a shared (today, metric) row
+    deltas = collect_deltas(session, TRACKED_MODELS)
+    if not deltas:
+        return
+    now = datetime.utcnow()
+    session.connection().execute(
+        insert(DailyRollupDelta),
+        [{"day": day, "metric": metric, "value": value, "created_at": now} for (day, metric), value in deltas.items()]
+    )
+
+
+def fold_rollups(db: Session):
+    """
+    Add the pending delta rows into daily_rollup and delete them. Commits.
+
+    Runs in a new transaction under the summary lock, like fold_deltas, so
+    no delta is counted twice.
+    """
+    db.commit()
+    lock_summary(db)
+    deltas = db.query(DailyRollupDelta.id, DailyRollupDelta.day, DailyRollupDelta.metric, DailyRollupDelta.value).all()
+
+    totals = {}
+    for _, day, metric, value in deltas:
+        totals[(day, metric)] = totals.get((day, metric), 0) + value
+    if totals:
+        now = datetime.utcnow()
+        upsert_increment(db.connection(), DailyRollup, [
+            {"day": day, "metric": metric, "value": value, "updated_at": now}
+            for (day, metric), value in sorted(totals.items())
+        ])
+        delete_deltas(db, DailyRollupDelta, [delta_id for delta_id, _, _, _ in deltas])
+    db.commit()
+
+
+def rebuild_rollups(db: Session, start: date, end: date):
+    """
+    Recompute the rollups for [start, end] from the source tables, one
+    grouped query per table. Commits.
+
+    Holds the summary lock, and reads the sources and the range's pending
+    delta ids in one snapshot: the deltas it deletes are exactly the writes
+    its aggregates already include, and later writes keep theirs.
+    """
+    db.commit()
+    lock_summary(db)
+    delta_ids = [
+        delta_id for (delta_id,) in
+        db.query(DailyRollupDelta.id).filter(DailyRollupDelta.day >= start, DailyRollupDelta.day <= end).all()
+    ]
+
+    def grouped(model, *aggregates, where=()):
+        day = func.date(model.created_at)
+        return db.query(day, *aggregates).filter(
+            model.created_at >= datetime.combine(start, datetime.min.time()),
+            model.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+            *where
+        ).group_by(day).all()
+
+    booking_rent = Booking.total_hours * Booking.price_per_hour
+    payment_rent = Payment.total_hours * Payment.price_per_hour
+    sources = [
+        (("users.new",), grouped(User, func.count(User.id), where=(User.user_type.in_(['user', 'owner']),))),
+        (("bookings.count", "bookings.hours", "bookings.amount"), grouped(
+            Booking,
+            func.count(Booking.id),
+            func.sum(Booking.total_hours),
+            func.sum(booking_rent - booking_rent * func.coalesce(Booking.coupon_discount, 0) / 100 + func.coalesce(Booking.late_charge, 0)),
+        )),
+        (("payments.amount",), grouped(Payment, func.sum(payment_rent - payment_rent * func.coalesce(Payment.coupon_discount, 0) / 100))),
+        (("refunds.count", "refunds.amount"), grouped(Refund, func.count(Refund.id), func.sum(Refund.refund_amount))),
+        (("penalties.amount",), grouped(Penalty, func.sum(Penalty.penalty_amount))),
+        (("payouts.amount",), grouped(Payout, func.sum(Payout.payout_amount))),
+    ]
+
+    now = datetime.utcnow()
+    rows = []
+    for metrics, results in sources:
+        for day, *values in results:
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            rows.extend(
+                {"day": day, "metric": metric, "value": float(value or 0), "updated_at": now}
+                for metric, value in zip(metrics, values)
+            )
+
+    db.execute(delete(DailyRollup).where(DailyRollup.day >= start, DailyRollup.day <= end))
+    if rows:
+        db.execute(insert(DailyRollup), rows)
+    delete_deltas(db, DailyRollupDelta, delta_ids)
+    db.commit()
+    return len(rows)
+
+
+def period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())   # ISO weeks start on Monday
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _periods(start: date, end: date, granularity: str):
+    period = period_start(start, granularity)
+    while period <= end:
+        yield period
+        if granularity == "day":
+            period += timedelta(days=1)
+        elif granularity == "week":
+            period += timedelta(days=7)
+        else:
+            period = (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def query_rollups(db: Session, start: date, end: date, granularity: str, metrics=ROLLUP_METRICS):
+    """
+    Rollups for [start, end] summed into day/week/month buckets; empty
+    buckets are zero-filled. Pending deltas are folded in first. Commits.
+    """
+    fold_rollups(db)
+    rows = db.query(DailyRollup.day, DailyRollup.metric, DailyRollup.value).filter(
+        DailyRollup.day >= start,
+        DailyRollup.day <= end,
+        DailyRollup.metric.in_(metrics)
+    ).all()
+
+    series = {period: dict.fromkeys(metrics, 0) for period in _periods(start, end, granularity)}
+    for day, metric, value in rows:
+        series[period_start(day, granularity)][metric] += value
+    return [{"period": period, **values} for period, values in series.items()]
@@ -0,0 +1,206 @@
+from datetime import datetime
+from sqlalchemy import event, func, select, insert, delete
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from models.dashboard_metric_model import DashboardMetric
+from models.dashboard_metric_delta_model import DashboardMetricDelta
+from models.booking_model import Booking
+from models.payment_model import Payment
+from models.refund_model import Refund
+from models.penalty_model import Penalty
+from models.payout_model import Payout
+from models.coupon_model import Coupon
+from utils.upsert import upsert_increment
+
+BOOKING_STATUSES = Booking.__table__.c.status.type.enums
+
+# Set by rebuild_summary; until it exists the counters are incomplete
+REBUILT_AT_KEY = "summary.rebuilt_at"
+# Row locked by every fold and rebuild so they run one at a time; not a metric
+LOCK_KEY = "summary.lock"
+
+# Folded delta rows are deleted this many ids per statement
+DELETE_CHUNK_SIZE = 1000
+
+
+def rent_amount(values):
+    rent = (values["total_hours"] or 0) * (values["price_per_hour"] or 0)
+    return rent - rent * (values["coupon_discount"] or 0) / 100
+
+
+def _booking_metrics(values):
+    return {
+        "bookings.count": 1,
+        f"bookings.status.{values['status']}": 1,
+        "bookings.hours": values["total_hours"] or 0,
+        "bookings.amount": rent_amount(values) + (values["late_charge"] or 0),
+    }
+
+
+# model -> (columns the metrics depend on, metrics one row contributes)
+TRACKED_MODELS = {
+    Booking: (("status", "total_hours", "price_per_hour", "coupon_discount", "late_charge"), _booking_metrics),
+    Payment: (("total_hours", "price_per_hour", "coupon_discount"), lambda values: {"payments.amount": rent_amount(values)}),
+    Refund: (("refund_amount",), lambda values: {"refunds.amount": values["refund_amount"] or 0}),
+    Penalty: (("penalty_amount",), lambda values: {"penalties.amount": values["penalty_amount"] or 0}),
+    Payout: (("payout_amount",), lambda values: {"payouts.amount": values["payout_amount"] or 0}),
+    Coupon: ((), lambda values: {"coupons.count": 1}),
+}
+
+
+def _previous_values(obj, columns):
+    values = {}
+    for column in columns:
+        history = get_history(obj, column)
+        values[column] = history.deleted[0] if history.deleted else getattr(obj, column)
+    return values
+
+
+def _add(deltas, metrics, sign):
+    for key, value in metrics.items():
+        deltas[key] = deltas.get(key, 0) + sign * value
+
+
+def collect_deltas(session, tracked_models):
+    """
+    Net metric changes from the objects this flush inserted, updated or
+    deleted. `tracked_models` maps a model to (columns, metrics), where
+    metrics(values) gives what one row with those column values contributes.
+    """
+    deltas = {}
+    for obj in session.new:
+        tracked = tracked_models.get(type(obj))
+        if tracked:
+            columns, metrics = tracked
+            _add(deltas, metrics({column: getattr(obj, column) for column in columns}), 1)
+    for obj in session.dirty:
+        tracked = tracked_models.get(type(obj))
+        if tracked and session.is_modified(obj):
+            columns, metrics = tracked
+            _add(deltas, metrics(_previous_values(obj, columns)), -1)
+            _add(deltas, metrics({column: getattr(obj, column) for column in columns}), 1)
+    for obj in session.deleted:
+        tracked = tracked_models.get(type(obj))
+        if tracked:
+            columns, metrics = tracked
+            _add(deltas, metrics(_previous_values(obj, columns)), -1)
+    return {key: value for key, value in deltas.items() if value}
+
+
+@event.listens_for(Session, "after_flush")
+def _track_dashboard_metrics(session, flush_context):
+    """
+    Append every ORM insert, update and delete of a tracked model to
+    dashboard_metric_delta, inside the same transaction as the write.
+
+    Writers only insert new rows, so bookings never wait on each other for a
+    shared counter; read_summary folds the deltas into dashboard_metric.
+
+    Core/bulk statements (query.update, insert(Model) executemany) bypass
+    this; none of them touch the tracked amount columns today. After any
+    out-of-band change, rebuild with POST /admin/dashboard-summary/rebuild.
+    """
+    deltas = collect_deltas(session, TRACKED_MODELS)
+    if deltas:
+        now = datetime.utcnow()
+        session.connection().execute(
+            insert(DashboardMetricDelta),
+            [{"key": key, "value": value, "created_at": now} for key, value in deltas.items()]
+        )
+
+
+def lock_summary(db: Session):
+    # Upserting the lock row takes its row lock until commit; concurrent folds and
+    # rebuilds (of this summary and of the daily rollups) queue here
+    upsert_increment(db.connection(), DashboardMetric, [{"key": LOCK_KEY, "value": 0, "updated_at": datetime.utcnow()}])
+
+
+def delete_deltas(db: Session, model, delta_ids):
+    # By id, never by range: a delta committed after our snapshot must survive to the next fold
+    for offset in range(0, len(delta_ids), DELETE_CHUNK_SIZE):
+        db.execute(delete(model).where(model.id.in_(delta_ids[offset:offset + DELETE_CHUNK_SIZE])))
+
+
+def fold_deltas(db: Session):
+    """
+    Add the pending delta rows into the counters, delete them and return
+    the counters. Commits.
+
+    Runs in a new transaction under the summary lock, so its snapshot starts
+    after every earlier fold committed and no delta is counted twice.
+    """
+    db.commit()
+    lock_summary(db)
+    deltas = db.query(DashboardMetricDelta.id, DashboardMetricDelta.key, DashboardMetricDelta.value).all()
+
+    totals = {}
+    for _, key, value in deltas:
+        totals[key] = totals.get(key, 0) + value
+    if totals:
+        now = datetime.utcnow()
+        upsert_increment(db.connection(), DashboardMetric, [
+            {"key": key, "value": value, "updated_at": now} for key, value in sorted(totals.items())
+        ])
+        delete_deltas(db, DashboardMetricDelta, [delta_id for delta_id, _, _ in deltas])
+
+    metrics = dict(db.query(DashboardMetric.key, DashboardMetric.value).filter(DashboardMetric.key != LOCK_KEY).all())
+    db.commit()
+    return metrics
+
+
+def rebuild_summary(db: Session):
+    """
+    Recompute every counter from the source tables and replace the stored
+    summary. Commits.
+
+    Holds the summary lock, and reads the sources and the pending delta ids
+    in one snapshot: the deltas it deletes are exactly the writes its
+    aggregates already include, and later writes keep theirs.
+    """
+    db.commit()
+    lock_summary(db)
+    delta_ids = [delta_id for (delta_id,) in db.query(DashboardMetricDelta.id).all()]
+
+    rent = Booking.total_hours * Booking.price_per_hour
+    booking_rows = db.query(
+        Booking.status,
+        func.count(Booking.id),
+        func.coalesce(func.sum(Booking.total_hours), 0),
+        func.coalesce(func.sum(rent - rent * func.coalesce(Booking.coupon_discount, 0) / 100 + func.coalesce(Booking.late_charge, 0)), 0),
+    ).group_by(Booking.status).all()
+
+    payment_rent = Payment.total_hours * Payment.price_per_hour
+    totals = db.query(
+        select(func.coalesce(func.sum(payment_rent - payment_rent * func.coalesce(Payment.coupon_discount, 0) / 100), 0)).scalar_subquery(),
+        select(func.coalesce(func.sum(Refund.refund_amount), 0)).scalar_subquery(),
+        select(func.coalesce(func.sum(Penalty.penalty_amount), 0)).scalar_subquery(),
+        select(func.coalesce(func.sum(Payout.payout_amount), 0)).scalar_subquery(),
+        select(func.count(Coupon.id)).scalar_subquery(),
+    ).one()
+
+    metrics = {"bookings.count": 0, "bookings.hours": 0, "bookings.amount": 0}
+    metrics.update({f"bookings.status.{status}": 0 for status in BOOKING_STATUSES})
+    for status, count, hours, amount in booking_rows:
+        metrics[f"bookings.status.{status}"] = count
+        metrics["bookings.count"] += count
+        metrics["bookings.hours"] += hours
+        metrics["bookings.amount"] += amount
+    for key, value in zip(("payments.amount", "refunds.amount", "penalties.amount", "payouts.amount", "coupons.count"), totals):
+        metrics[key] = value
+
+    now = datetime.utcnow()
+    metrics[REBUILT_AT_KEY] = now.timestamp()
+    db.execute(delete(DashboardMetric).where(DashboardMetric.key != LOCK_KEY))
+    db.execute(insert(DashboardMetric), [{"key": key, "value": float(value), "updated_at": now} for key, value in metrics.items()])
+    delete_deltas(db, DashboardMetricDelta, delta_ids)
+    db.commit()
+    return metrics
+
+
+def read_summary(db: Session):
+    """Current counters, with pending deltas folded in. Commits."""
+    metrics = fold_deltas(db)
+    if REBUILT_AT_KEY not in metrics:
+        # First read after the table was created: writes so far only added partial deltas
+        metrics = rebuild_summary(db)
+    return metrics
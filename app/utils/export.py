@@ -0,0 +1,168 @@
+import csv
+import io
+from datetime import datetime
+from sqlalchemy import select, Boolean, DateTime, Float, Integer
+from fastapi.responses import StreamingResponse
+from database import SessionLocal
+from models.booking_model import Booking
+from models.payment_model import Payment
+from models.refund_model import Refund
+from models.penalty_model import Penalty
+from models.payout_model import Payout
+from utils.streaming import keyset_batches
+
+# table -> (model, column the status filter applies to)
+EXPORT_TABLES = {
+    "booking": (Booking, "status"),
+    "payment": (Payment, "status"),
+    "refund": (Refund, "status"),
+    "penalty": (Penalty, "payment_status"),
+    "payout": (Payout, "status"),
+}
+
+# Inspection image URLs are of no use for reconciliation and dominate the row size;
+# pickup/drop OTPs must not leave the system
+EXCLUDED_COLUMNS = {
+    "booking": {
+        column.key for column in Booking.__table__.columns
+        if column.key.endswith("_image_url") or column.key.endswith("_otp")
+    },
+}
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_columns(table):
+    model, _ = EXPORT_TABLES[table]
+    excluded = EXCLUDED_COLUMNS.get(table, set())
+    return [column for column in model.__table__.columns if column.key not in excluded]
+
+
+def status_values(table):
+    model, status_column = EXPORT_TABLES[table]
+    return model.__table__.c[status_column].type.enums
+
+
+def export_statement(table, start=None, end=None, status=None):
+    model, status_column = EXPORT_TABLES[table]
+    columns = export_columns(table)
+    statement = select(*columns).order_by(model.__table__.c.id)
+    if start is not None:
+        statement = statement.where(model.__table__.c.created_at >= start)
+    if end is not None:
+        statement = statement.where(model.__table__.c.created_at < end)
+    if status is not None:
+        statement = statement.where(model.__table__.c[status_column] == status)
+    return statement
+
+
+def _stream_batches(table, statement):
+    """
+    Row batches of `statement`, read by id with keyset_batches so memory
+    stays at one batch whatever the table size.
+
+    All batches run in one REPEATABLE READ transaction of non-locking
+    consistent reads: writers to the exported tables are never blocked, and
+    the whole export sees one snapshot.
+    """
+    model, _ = EXPORT_TABLES[table]
+    db = SessionLocal()
+    try:
+        yield from keyset_batches(db, statement, ((model.__table__.c.id, False),))
+    finally:
+        db.close()
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(table, statement):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in export_columns(table)])
+    for batch in _stream_batches(table, statement):
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    # Collects what the Parquet writer emits so it can be handed out chunk by chunk
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_type(pa, column):
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _parquet_chunks(table, statement):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = export_columns(table)
+    schema = pa.schema([pa.field(column.key, _arrow_type(pa, column)) for column in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        # One row group per fetched batch
+        for batch in _stream_batches(table, statement):
+            writer.write_batch(pa.RecordBatch.from_pylist([dict(row._mapping) for row in batch], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def stream_export(table, file_format="csv", start=None, end=None, status=None):
+    """Stream one financial table as CSV or Parquet, ordered by id."""
+    statement = export_statement(table, start, end, status)
+    chunks = _parquet_chunks(table, statement) if file_format == "parquet" else _csv_chunks(table, statement)
+    filename = f"{table}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.{file_format}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,96 @@
+from math import radians, degrees, cos, sin, asin, sqrt, ceil
+
+EARTH_RADIUS_KM = 6371
+
+# Precision stored on Car.geohash (~150m x 150m cells)
+GEOHASH_PRECISION = 7
+
+# Upper bound on the number of geohash prefixes a single search expands into
+MAX_SEARCH_CELLS = 12
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def calculate_distance(lat1, lon1, lat2, lon2):
+    # Convert decimal degrees to radians
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    # Haversine formula
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * asin(sqrt(a))
+    return c * EARTH_RADIUS_KM
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bit, ch, even = 0, 0, True
+    while len(geohash) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch |= 1 << (4 - bit)
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        if bit < 4:
+            bit += 1
+        else:
+            geohash.append(_BASE32[ch])
+            bit, ch = 0, 0
+    return "".join(geohash)
+
+
+def geohash_cell_size(precision):
+    # Height and width (in degrees) of a geohash cell of the given precision
+    bits = 5 * precision
+    lat_bits = bits // 2
+    lon_bits = bits - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def bounding_box(latitude, longitude, distance_km):
+    # Lat/lon box that fully contains the circle of `distance_km` around the point
+    lat_delta = degrees(distance_km / EARTH_RADIUS_KM)
+    min_lat = max(latitude - lat_delta, -90.0)
+    max_lat = min(latitude + lat_delta, 90.0)
+
+    widest_lat = max(abs(min_lat), abs(max_lat))
+    if widest_lat >= 89.9:
+        return min_lat, -180.0, max_lat, 180.0
+    lon_delta = lat_delta / cos(radians(widest_lat))
+    return min_lat, max(longitude - lon_delta, -180.0), max_lat, min(longitude + lon_delta, 180.0)
+
+
+def covering_geohashes(min_lat, min_lon, max_lat, max_lon):
+    """
+    Geohash prefixes whose cells together cover the bounding box.
+
+    Uses the finest precision that keeps the cover within MAX_SEARCH_CELLS,
+    so each prefix turns into one `geohash LIKE 'prefix%'` range scan.
+    """
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lon_step = geohash_cell_size(candidate)
+        cells = (ceil((max_lat - min_lat) / lat_step) + 1) * (ceil((max_lon - min_lon) / lon_step) + 1)
+        if cells <= MAX_SEARCH_CELLS:
+            precision = candidate
+            break
+
+    lat_step, lon_step = geohash_cell_size(precision)
+    prefixes = set()
+    lat = min_lat
+    while True:
+        lon = min_lon
+        while True:
+            prefixes.add(encode_geohash(min(lat, max_lat), min(lon, max_lon), precision))
+            if lon >= max_lon:
+                break
+            lon += lon_step
+        if lat >= max_lat:
+            break
+        lat += lat_step
+    return sorted(prefixes)
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from config import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_LOCK_SECONDS, IDEMPOTENCY_WAIT_SECONDS, IDEMPOTENCY_PURGE_SECONDS
+from database import SessionLocal
+from models.idempotency_key_model import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Waiting duplicates re-check the stored key with this backoff (seconds)
+POLL_INITIAL = 0.05
+POLL_MAX = 0.5
+
+
+def request_fingerprint(payload) -> str:
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _claim(scope, key, request_hash):
+    """
+    Try to take ownership of (scope, key).
+
+    Returns None when this request now owns the key, otherwise the stored row
+    as (request_hash, status, status_code, response).
+    """
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        existing = db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).first()
+        if existing is not None and existing.expires_at <= now:
+            # Expired response, or an owner that died mid-request
+            db.delete(existing)
+            db.commit()
+            existing = None
+        if existing is not None:
+            return existing.request_hash, existing.status, existing.status_code, existing.response
+
+        db.add(IdempotencyKey(
+            scope=scope,
+            key=key,
+            request_hash=request_hash,
+            status='in_progress',
+            created_at=now,
+            expires_at=now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+        ))
+        try:
+            db.commit()
+            return None
+        except IntegrityError:
+            # Another request claimed it between our read and insert
+            db.rollback()
+            existing = db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).first()
+            if existing is None:
+                return _claim(scope, key, request_hash)
+            return existing.request_hash, existing.status, existing.status_code, existing.response
+    finally:
+        db.close()
+
+
+def _complete(scope, key, status_code, content):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).update({
+            "status": 'completed',
+            "status_code": status_code,
+            "response": json.dumps(content),
+            "expires_at": datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _release(scope, key):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status == 'in_progress'
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _replay(status_code, response):
+    return JSONResponse(status_code=status_code, content=json.loads(response), headers={REPLAYED_HEADER: "true"})
+
+
+async def run_idempotent(request: Request, scope: str, payload, handler):
+    """
+    Run `handler` at most once per Idempotency-Key within `scope`.
+
+    Without the header the handler just runs. With it, the first request runs
+    the handler and stores its response (including 4xx errors); replays get the
+    stored response back. A duplicate that arrives while the first is still
+    running waits for it. Reusing a key with a different payload is a 422.
+    Unexpected failures release the key so the client can retry.
+
+    `handler` takes no arguments; coroutine functions are awaited, plain
+    functions run in the threadpool.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return await _call(handler)
+    if len(key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+
+    request_hash = request_fingerprint(payload)
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    delay = POLL_INITIAL
+    while True:
+        stored = await run_in_threadpool(_claim, scope, key, request_hash)
+        if stored is None:
+            break
+        stored_hash, status, status_code, response = stored
+        if stored_hash != request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        if status == 'completed':
+            return _replay(status_code, response)
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, POLL_MAX)
+
+    try:
+        result = await _call(handler)
+    except HTTPException as e:
+        if e.status_code >= 500:
+            await run_in_threadpool(_release, scope, key)
+            raise
+        await run_in_threadpool(_complete, scope, key, e.status_code, {"detail": e.detail})
+        raise
+    except BaseException:
+        await run_in_threadpool(_release, scope, key)
+        raise
+
+    content = jsonable_encoder(result)
+    await run_in_threadpool(_complete, scope, key, 200, content)
+    return JSONResponse(content=content)
+
+
+async def _call(handler):
+    if inspect.iscoroutinefunction(handler):
+        return await handler()
+    return await run_in_threadpool(handler)
+
+
+def purge_expired_keys(db):
+    deleted = db.query(IdempotencyKey).filter(IdempotencyKey.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def _purge_loop(interval):
+    while True:
+        time.sleep(interval)
+        db = SessionLocal()
+        try:
+            purge_expired_keys(db)
+        except Exception as e:
+            print(f"Idempotency key purge failed: {str(e)}")
+        finally:
+            db.close()
+
+
+_purge_thread = None
+
+
+def start_idempotency_purge(interval=IDEMPOTENCY_PURGE_SECONDS):
+    global _purge_thread
+    if _purge_thread is not None:
+        return
+    _purge_thread = threading.Thread(target=_purge_loop, args=(interval,), name="idempotency-purge", daemon=True)
+    _purge_thread.start()
@@ -0,0 +1,45 @@
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.scheduler_lease_model import SchedulerLease
+
+# Identifies this process as a lease holder
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lease(db: Session, name: str, seconds: float, holder: str = WORKER_ID) -> bool:
+    """
+    Take or renew the named lease. True while this worker holds it.
+
+    A lease can only be taken over once its holder has let it expire, so at
+    most one worker holds it at a time.
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=seconds)
+    renewed = db.query(SchedulerLease).filter(
+        SchedulerLease.name == name,
+        (SchedulerLease.holder == holder) | (SchedulerLease.expires_at < now)
+    ).update({"holder": holder, "expires_at": expires_at, "updated_at": now}, synchronize_session=False)
+    if renewed:
+        db.commit()
+        return True
+
+    if db.query(SchedulerLease.name).filter(SchedulerLease.name == name).first():
+        db.rollback()
+        return False
+
+    db.add(SchedulerLease(name=name, holder=holder, expires_at=expires_at, updated_at=now))
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        # Another worker created it first
+        db.rollback()
+        return False
+
+
+def release_lease(db: Session, name: str, holder: str = WORKER_ID):
+    db.query(SchedulerLease).filter(SchedulerLease.name == name, SchedulerLease.holder == holder).delete(synchronize_session=False)
+    db.commit()
@@ -0,0 +1,74 @@
+import hashlib
+import hmac
+import httpx
+from config import (
+    RAZORPAY_KEY_ID,
+    RAZORPAY_KEY_SECRET,
+    RAZORPAY_API_BASE,
+    RAZORPAY_CONNECT_TIMEOUT_SECONDS,
+    RAZORPAY_TIMEOUT_SECONDS,
+    RAZORPAY_MAX_CONNECTIONS,
+)
+
+
+class PaymentGatewayError(Exception):
+    pass
+
+
+def verify_signature(message: str, signature: str, secret: str = RAZORPAY_KEY_SECRET) -> bool:
+    generated_signature = hmac.new(
+        bytes(secret, "utf-8"),
+        message.encode("utf-8"),
+        hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(generated_signature, signature)
+
+
+class RazorpayGateway:
+    """
+    Async Razorpay REST client sharing one pooled HTTP connection set per process.
+
+    Every call has hard connect/read timeouts so a slow gateway fails fast
+    instead of holding a worker.
+    """
+
+    def __init__(self, base_url=RAZORPAY_API_BASE, key_id=RAZORPAY_KEY_ID, key_secret=RAZORPAY_KEY_SECRET):
+        self.base_url = base_url
+        self.auth = (key_id or "", key_secret or "")
+        self._client = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=self.auth,
+                timeout=httpx.Timeout(RAZORPAY_TIMEOUT_SECONDS, connect=RAZORPAY_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(max_connections=RAZORPAY_MAX_CONNECTIONS, max_keepalive_connections=RAZORPAY_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    async def _request(self, method, path, **kwargs) -> dict:
+        try:
+            response = await self._http().request(method, path, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except httpx.TimeoutException:
+            raise PaymentGatewayError(f"Razorpay {method} {path} timed out")
+        except httpx.HTTPStatusError as e:
+            raise PaymentGatewayError(f"Razorpay {method} {path} failed with {e.response.status_code}: {e.response.text}")
+        except httpx.HTTPError as e:
+            raise PaymentGatewayError(f"Razorpay {method} {path} failed: {str(e)}")
+
+    async def fetch_payment(self, payment_id: str) -> dict:
+        return await self._request("GET", f"/payments/{payment_id}")
+
+    async def create_order(self, data: dict) -> dict:
+        return await self._request("POST", "/orders", json=data)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+razorpay_gateway = RazorpayGateway()
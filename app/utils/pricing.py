@@ -0,0 +1,62 @@
+import numpy as np
+from datetime import timedelta
+from config import SECURITY_DEPOSIT
+
+# Drops later than end time + grace are charged price_per_hour for every started hour
+LATE_GRACE_PERIOD = timedelta(hours=1)
+
+
+def booking_hours(start_datetime, end_datetime):
+    return round((end_datetime - start_datetime).total_seconds() / 3600, 2)
+
+
+def rent_after_coupon(total_hours, price_per_hour, coupon_discount):
+    """Rent charged for the booked hours once the coupon percentage is taken off."""
+    rent = round(total_hours * price_per_hour)
+    return rent - rent * (coupon_discount or 0) / 100
+
+
+def quote_matrix(prices, hours, coupon_discount=0.0, security_deposit=SECURITY_DEPOSIT):
+    """
+    Quotes for every (car, window) pair in one pass.
+
+    `prices` holds each car's price_per_hour and `hours` each window's length.
+    Returns arrays shaped (cars, windows) for rent, coupon amount and total
+    payable, computed with the same formula as rent_after_coupon.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    hours = np.asarray(hours, dtype=np.float64)
+
+    rent = np.round(np.outer(prices, hours))
+    coupon_amount = rent * (coupon_discount or 0) / 100
+    total = rent - coupon_amount + security_deposit
+    return rent, coupon_amount, total
+
+
+def quote_booking(price_per_hour, start_datetime, end_datetime, coupon_discount=0.0):
+    """Server-side amounts for a single booking, as stored on Booking and Payment."""
+    total_hours = booking_hours(start_datetime, end_datetime)
+    rent, coupon_amount, total = quote_matrix([price_per_hour], [total_hours], coupon_discount)
+    return {
+        "total_hours": total_hours,
+        "price_per_hour": price_per_hour,
+        "coupon_discount": coupon_discount or 0.0,
+        "security_deposit": SECURITY_DEPOSIT,
+        "rent": float(rent[0, 0]),
+        "coupon_amount": float(coupon_amount[0, 0]),
+        "total_amount": float(total[0, 0]),
+    }
+
+
+def amount_in_paise(amount):
+    # Razorpay amounts are integer paise (1 INR = 100 paise)
+    return int(round(amount * 100))
+
+
+def late_fee_schedule(price_per_hour, security_deposit=SECURITY_DEPOSIT):
+    return {
+        "grace_hours": LATE_GRACE_PERIOD.total_seconds() / 3600,
+        "late_fee_per_hour": price_per_hour,
+        # Late hours the deposit absorbs before the excess becomes a penalty
+        "deposit_covers_hours": int(security_deposit // price_per_hour) if price_per_hour else None,
+    }
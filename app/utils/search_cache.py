@@ -0,0 +1,162 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from config import SEARCH_CACHE_BACKEND, SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL_SECONDS, REDIS_URL
+from utils.geo import encode_geohash, GEOHASH_PRECISION
+
+# Search points are snapped to this many decimals (~110m) so nearby requests share entries
+SEARCH_POINT_DECIMALS = 3
+
+
+def quantize_search(search_params):
+    return search_params.model_copy(update={
+        "latitude": round(search_params.latitude, SEARCH_POINT_DECIMALS),
+        "longitude": round(search_params.longitude, SEARCH_POINT_DECIMALS),
+    })
+
+
+def search_cache_key(search_params) -> str:
+    raw = json.dumps(search_params.model_dump(mode="json"), sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _point_prefixes(latitude, longitude):
+    geohash = encode_geohash(latitude, longitude, GEOHASH_PRECISION)
+    return [geohash[:length] for length in range(1, GEOHASH_PRECISION + 1)]
+
+
+class InProcessSearchCache:
+    """
+    LRU cache of search pages, local to this worker process.
+
+    Every entry is registered under the geohash cells its search covered, so a
+    change to a car only drops the entries whose region contains that car.
+    Each cell also has a generation, bumped on every invalidation; a page is
+    only stored if none of its cells moved on while it was being built.
+    """
+
+    def __init__(self, max_entries=SEARCH_CACHE_MAX_ENTRIES, ttl_seconds=SEARCH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()   # key -> (expires_at, value, cells)
+        self._regions = {}              # cell -> set of keys
+        self._generations = {}          # cell -> invalidation count
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def generation(self, cells):
+        with self._lock:
+            return [self._generations.get(cell, 0) for cell in cells]
+
+    def set(self, key, value, cells, generation):
+        with self._lock:
+            if [self._generations.get(cell, 0) for cell in cells] != generation:
+                # A car in this region changed while the page was built; it may be stale
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value, cells)
+            for cell in cells:
+                self._regions.setdefault(cell, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_point(self, latitude, longitude):
+        with self._lock:
+            for prefix in _point_prefixes(latitude, longitude):
+                self._generations[prefix] = self._generations.get(prefix, 0) + 1
+                for key in list(self._regions.get(prefix, ())):
+                    self._drop(key)
+
+    def _drop(self, key):
+        _, _, cells = self._entries.pop(key)
+        for cell in cells:
+            keys = self._regions.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._regions[cell]
+
+
+class RedisSearchCache:
+    """
+    Search cache shared by all workers through Redis.
+
+    Size is bounded by the server's maxmemory with an allkeys-lru policy;
+    entries also expire after the TTL.
+    """
+
+    ENTRY_PREFIX = "search:entry:"
+    REGION_PREFIX = "search:region:"
+    GENERATION_PREFIX = "search:generation:"
+
+    def __init__(self, url=REDIS_URL, ttl_seconds=SEARCH_CACHE_TTL_SECONDS):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key):
+        raw = self.client.get(self.ENTRY_PREFIX + key)
+        return json.loads(raw) if raw is not None else None
+
+    def generation(self, cells):
+        return [int(value or 0) for value in self.client.mget([self.GENERATION_PREFIX + cell for cell in cells])]
+
+    def set(self, key, value, cells, generation):
+        import redis
+        generation_keys = [self.GENERATION_PREFIX + cell for cell in cells]
+        with self.client.pipeline() as pipe:
+            try:
+                # WATCH makes the write fail if any cell is invalidated between the check and EXEC
+                pipe.watch(*generation_keys)
+                if [int(current or 0) for current in pipe.mget(generation_keys)] != generation:
+                    return
+                pipe.multi()
+                pipe.set(self.ENTRY_PREFIX + key, json.dumps(value), ex=self.ttl_seconds)
+                for cell in cells:
+                    pipe.sadd(self.REGION_PREFIX + cell, key)
+                    pipe.expire(self.REGION_PREFIX + cell, self.ttl_seconds)
+                pipe.execute()
+            except redis.WatchError:
+                pass
+
+    def invalidate_point(self, latitude, longitude):
+        prefixes = _point_prefixes(latitude, longitude)
+        regions = [self.REGION_PREFIX + prefix for prefix in prefixes]
+        pipe = self.client.pipeline()
+        for prefix in prefixes:
+            pipe.incr(self.GENERATION_PREFIX + prefix)
+        pipe.execute()
+        keys = self.client.sunion(regions)
+        pipe = self.client.pipeline()
+        if keys:
+            pipe.delete(*[self.ENTRY_PREFIX + key.decode("utf-8") for key in keys])
+        pipe.delete(*regions)
+        pipe.execute()
+
+
+def create_search_cache():
+    if SEARCH_CACHE_BACKEND == "redis":
+        return RedisSearchCache()
+    return InProcessSearchCache()
+
+
+search_cache = create_search_cache()
+
+
+def invalidate_car(car):
+    # Call after the change is committed. Searches already running when it lands
+    # see the bumped generation and do not store their (possibly pre-commit) page.
+    search_cache.invalidate_point(car.latitude, car.longitude)
@@ -0,0 +1,67 @@
+import numpy as np
+from utils.geo import EARTH_RADIUS_KM
+
+class CandidateColumns:
+    """Search candidates held column-wise so distance and ordering run as array ops."""
+
+    __slots__ = ("ids", "latitude", "longitude", "price")
+
+    def __init__(self, rows):
+        # rows: (id, latitude, longitude, price_per_hour)
+        columns = list(zip(*rows)) if rows else [()] * 4
+        self.ids = np.asarray(columns[0], dtype=np.int64)
+        self.latitude = np.asarray(columns[1], dtype=np.float64)
+        self.longitude = np.asarray(columns[2], dtype=np.float64)
+        self.price = np.asarray(columns[3], dtype=np.float64)
+
+
+def haversine(latitude, longitude, latitudes, longitudes):
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _sort_keys(sort_by, distances, prices, ids):
+    if sort_by == "nearest":
+        return distances
+    if sort_by == "price-low":
+        return prices
+    if sort_by == "price-high":
+        return -prices
+    return ids.astype(np.float64)
+
+
+def rank_candidates(columns: CandidateColumns, search_params, after=None, limit=None):
+    """
+    Apply the distance cut-off and the requested ordering in one pass.
+
+    Attribute filters (car type, fuel, rating, ...) are already applied in SQL.
+
+    `after` is the (sort_key, car_id) of the last result already served; only
+    results ordered strictly after it are returned. With `limit`, the page is
+    picked by partial selection (np.partition) instead of sorting every match.
+
+    Returns (car_ids, distances, sort_keys, has_more) with arrays in result order.
+    """
+    distances = haversine(search_params.latitude, search_params.longitude, columns.latitude, columns.longitude)
+
+    mask = distances < search_params.distance
+    ids = columns.ids
+    keys = _sort_keys(search_params.sortBy, distances, columns.price, ids)
+    if after is not None:
+        last_key, last_id = after
+        mask &= (keys > last_key) | ((keys == last_key) & (ids > last_id))
+
+    selected = np.flatnonzero(mask)
+    ids, keys, distances = ids[selected], keys[selected], distances[selected]
+
+    has_more = limit is not None and len(ids) > limit
+    if has_more:
+        # Everything at or below the limit-th smallest key; ties on it are settled by id below
+        kth_key = np.partition(keys, limit - 1)[limit - 1]
+        top = np.flatnonzero(keys <= kth_key)
+        ids, keys, distances = ids[top], keys[top], distances[top]
+
+    order = np.lexsort((ids, keys))[:limit]
+    return ids[order], distances[order], keys[order], has_more
@@ -0,0 +1,204 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from models.booking_model import Booking
+from models.payment_model import Payment
+from models.car_model import Car
+from models.refund_model import Refund
+from models.penalty_model import Penalty
+from models.payout_model import Payout
+from models.coupon_model import Coupon
+from utils.availability import release_interval
+from utils.pricing import rent_after_coupon, LATE_GRACE_PERIOD
+
+SETTLEMENT_KINDS = ("drop", "cancel", "owner_cancel", "system_cancel")
+
+# Bookings in these states have already been settled
+SETTLED_STATUSES = ("completed", "cancelled_by_user", "cancelled_by_owner", "cancelled_by_system")
+
+OWNER_PAYOUT_SHARE = 0.9
+OWNER_CANCEL_PENALTY_RATE = 0.1
+OWNER_CANCEL_COUPON_DISCOUNT = 10.0
+
+# Back-office batches are committed in chunks of this many bookings
+SETTLEMENT_BATCH_SIZE = 200
+
+
+def compute_settlement(kind, booking, payment, now, refund_percentage=None):
+    """
+    Work out every money movement for settling one booking. Pure: reads the
+    booking and payment, touches nothing.
+
+    Returns a dict with the booking's new status and late charge plus the
+    column values for the refund, penalty, payout and coupon rows to create
+    (None where the settlement has no such row).
+    """
+    rent = rent_after_coupon(payment.total_hours, payment.price_per_hour, payment.coupon_discount)
+    result = {"status": None, "late_charge": None, "refund": None, "penalty": None, "payout": None, "coupon": None}
+
+    if kind == "drop":
+        late_charge = 0
+        deduction_reason = None
+        refund_amount = payment.security_deposit
+
+        grace_period_end = booking.end_datetime + LATE_GRACE_PERIOD
+        if now > grace_period_end:
+            late_hours = (now - grace_period_end).total_seconds() / 3600
+            late_hours_rounded = round(late_hours + 0.5)  # Round to nearest hour
+            late_charge = int(payment.price_per_hour * late_hours_rounded)
+
+            if late_charge <= payment.security_deposit:
+                refund_amount = payment.security_deposit - late_charge
+                deduction_reason = f"Late return by {late_hours_rounded} hours"
+            else:
+                refund_amount = 0
+                deduction_reason = f"Security fully deducted. Late by {late_hours_rounded} hours"
+                result["penalty"] = {
+                    "user_id": booking.car_owner_id,
+                    "penalty_amount": late_charge - payment.security_deposit,
+                    "penalty_reason": f"Late return by {late_hours_rounded} hours",
+                    "reason": "late_drop",
+                }
+
+        result["status"] = "completed"
+        result["late_charge"] = late_charge
+        result["refund"] = {
+            "user_id": booking.user_id,
+            "reason": "refundable",
+            "deduction_amount": late_charge,
+            "deduction_reason": deduction_reason,
+            "refund_amount": refund_amount,
+        }
+        result["payout"] = {
+            "owner_id": booking.car_owner_id,
+            "car_id": booking.car_id,
+            "total_hours": payment.total_hours,
+            "price_per_hour": payment.price_per_hour,
+            "coupon_discount": payment.coupon_discount or 0,
+            "late_charge": late_charge,
+            "payout_amount": OWNER_PAYOUT_SHARE * (late_charge + rent),
+        }
+
+    elif kind == "cancel":
+        refund_percentage = max(0, refund_percentage or 0)
+        refundable_amount = round(rent * (refund_percentage / 100), 2)
+
+        result["status"] = "cancelled_by_user"
+        result["refund"] = {
+            "user_id": booking.user_id,
+            "reason": "cancelled_by_user",
+            "refund_amount": refundable_amount + payment.security_deposit,
+            "deduction_amount": round(rent - refundable_amount, 2),
+            "deduction_reason": f"{round(refund_percentage)}% refund based on remaining time before start",
+        }
+
+    elif kind == "owner_cancel":
+        result["status"] = "cancelled_by_owner"
+        result["refund"] = {
+            "user_id": booking.user_id,
+            "reason": "cancelled_by_owner",
+            "deduction_amount": 0,
+            "deduction_reason": "No deductions — full refund due to owner's cancellation",
+            "refund_amount": rent + payment.security_deposit,
+        }
+        result["penalty"] = {
+            "user_id": booking.car_owner_id,
+            "penalty_amount": OWNER_CANCEL_PENALTY_RATE * rent,
+            "penalty_reason": "Penalty charged because owner cancelled the booking before trip start",
+            "reason": "cancelled_by_owner",
+        }
+        result["coupon"] = {
+            "user_id": booking.user_id,
+            "discount": OWNER_CANCEL_COUPON_DISCOUNT,
+        }
+
+    elif kind == "system_cancel":
+        # Not picked up in time (utils.booking_scheduler); nobody is charged
+        result["status"] = "cancelled_by_system"
+        result["refund"] = {
+            "user_id": booking.user_id,
+            "reason": "cancelled_by_system",
+            "deduction_amount": 0,
+            "deduction_reason": "No deductions — booking was not picked up and was cancelled by the system",
+            "refund_amount": rent + payment.security_deposit,
+        }
+
+    else:
+        raise ValueError(f"Unknown settlement kind: {kind}")
+
+    return result
+
+
+def load_settlement_rows(db: Session, booking_ids):
+    """Booking, payment and car for each id in one locked, joined query: {booking_id: (booking, payment, car)}."""
+    rows = (
+        db.query(Booking, Payment, Car)
+        .outerjoin(Payment, Payment.id == Booking.payment_id)
+        .outerjoin(Car, Car.id == Booking.car_id)
+        .filter(Booking.id.in_(booking_ids))
+        .with_for_update()
+        .all()
+    )
+    return {booking.id: (booking, payment, car) for booking, payment, car in rows}
+
+
+def apply_settlement(db: Session, booking, car, result):
+    """Stage the booking update and the resulting rows; the caller commits."""
+    booking.status = result["status"]
+    if result["late_charge"] is not None:
+        booking.late_charge = result["late_charge"]
+
+    if car:
+        release_interval(db, car, booking.id)
+
+    if result["refund"]:
+        db.add(Refund(booking_id=booking.id, **result["refund"]))
+    if result["penalty"]:
+        db.add(Penalty(booking_id=booking.id, payment_status="unpaid", **result["penalty"]))
+    if result["payout"]:
+        db.add(Payout(booking_id=booking.id, status="pending", **result["payout"]))
+    if result["coupon"]:
+        db.add(Coupon(**result["coupon"]))
+
+
+def settle_batch(db: Session, items):
+    """
+    Settle many bookings, committing once per chunk of SETTLEMENT_BATCH_SIZE.
+
+    `items` are SettlementItem requests. Returns (per-item results, touched cars);
+    invalidate the cars' cached searches after this returns.
+    """
+    results = []
+    cars = {}
+    now = datetime.utcnow()
+
+    for offset in range(0, len(items), SETTLEMENT_BATCH_SIZE):
+        chunk = items[offset:offset + SETTLEMENT_BATCH_SIZE]
+        rows = load_settlement_rows(db, {item.booking_id for item in chunk})
+        seen = set()
+
+        for item in chunk:
+            row = rows.get(item.booking_id)
+            if row is None:
+                results.append({"booking_id": item.booking_id, "status": "failed", "message": "Booking not found"})
+                continue
+            booking, payment, car = row
+            if payment is None:
+                results.append({"booking_id": item.booking_id, "status": "failed", "message": "Payment not found"})
+                continue
+            if booking.status in SETTLED_STATUSES or booking.id in seen:
+                results.append({"booking_id": item.booking_id, "status": "failed", "message": f"Booking already {booking.status.replace('_', ' ')}"})
+                continue
+
+            if item.kind == "drop":
+                booking.drop_otp_used = True
+                booking.returned_time = item.returned_time or now
+            result = compute_settlement(item.kind, booking, payment, item.returned_time or now, item.refund_percentage)
+            apply_settlement(db, booking, car, result)
+            seen.add(booking.id)
+            if car:
+                cars[car.id] = car
+            results.append({"booking_id": item.booking_id, "status": "settled", "message": result["status"]})
+
+        db.commit()
+
+    return results, list(cars.values())
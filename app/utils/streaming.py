@@ -0,0 +1,87 @@
+import json
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query, Session
+from database import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Rows fetched per keyset round trip
+STREAM_BATCH_SIZE = 500
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _after(keys, values):
+    # Rows that sort after `values` under `keys`, compared lexicographically
+    clauses = []
+    for index, (column, descending) in enumerate(keys):
+        step = column < values[index] if descending else column > values[index]
+        clauses.append(and_(*[keys[earlier][0] == values[earlier] for earlier in range(index)], step))
+    return or_(*clauses)
+
+
+def keyset_batches(db: Session, query, keys, batch_size=STREAM_BATCH_SIZE):
+    """
+    Yield the rows of `query` in batches of `batch_size`, each fetched with
+    `WHERE (keys) > last ORDER BY keys LIMIT batch_size`.
+
+    The mysqlconnector driver buffers every result set client-side (SQLAlchemy
+    has no server-side cursors for it), so stream_results would still load the
+    whole result; bounded LIMIT queries keep memory at one batch. All batches
+    run in the session's single REPEATABLE READ transaction and so read one
+    consistent snapshot without locking anything.
+
+    `query` is an ORM Query for one entity or a Core select. `keys` are
+    (column, descending) pairs and must end in a unique column.
+    """
+    if db.get_bind().dialect.name == "mysql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    order = [column.desc() if descending else column.asc() for column, descending in keys]
+    is_orm = isinstance(query, Query)
+    last = None
+    while True:
+        page = query if last is None else query.where(_after(keys, last))
+        page = page.order_by(None).order_by(*order).limit(batch_size)
+        rows = page.all() if is_orm else db.execute(page).all()
+        if not rows:
+            return
+        last = [getattr(rows[-1], column.key) for column, _ in keys]
+        yield rows
+        if is_orm:
+            # Nothing is modified; let the batch's objects be freed
+            db.expunge_all()
+        if len(rows) < batch_size:
+            return
+
+
+def stream_query(build_query, schema, keys, headers=None):
+    """
+    Stream the rows of `build_query(db)` as NDJSON, one `schema` document per
+    line, in `keys` order (see keyset_batches).
+
+    The generator owns its session: the request's session from get_db is
+    closed before a streaming body is sent.
+    """
+    def generate():
+        db = SessionLocal()
+        try:
+            for batch in keyset_batches(db, build_query(db), keys):
+                yield "".join(
+                    json.dumps(jsonable_encoder(schema.model_validate(row, from_attributes=True))) + "\n"
+                    for row in batch
+                )
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+def stream_items(items, headers=None):
+    # NDJSON for results that are already serialized
+    return StreamingResponse((json.dumps(item) + "\n" for item in items), media_type=NDJSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,67 @@
+import threading
+import time
+from datetime import datetime
+from database import SessionLocal
+
+
+class StaleWhileRevalidateCache:
+    """
+    Holds one computed value and serves it immediately, even once it is older
+    than the TTL. The first stale read starts a single background refresh;
+    everyone else keeps getting the previous value until it lands.
+
+    `compute(db)` runs with its own session. Only the very first read waits
+    for a computation.
+    """
+
+    def __init__(self, compute, ttl_seconds, name):
+        self.compute = compute
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._value = None
+        self._computed_at = None        # monotonic, for age
+        self._computed_at_utc = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._initial_lock = threading.Lock()
+
+    def get(self):
+        """Returns (value, metadata) where metadata carries the cache age."""
+        if self._value is None:
+            with self._initial_lock:
+                if self._value is None:
+                    self._refresh()
+
+        with self._lock:
+            age = time.monotonic() - self._computed_at
+            stale = age > self.ttl_seconds
+            if stale and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._background_refresh, name=f"{self.name}-refresh", daemon=True).start()
+            return self._value, {
+                "age_seconds": round(age, 3),
+                "computed_at": self._computed_at_utc,
+                "stale": stale,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    def _refresh(self):
+        db = SessionLocal()
+        try:
+            value = self.compute(db)
+        finally:
+            db.close()
+        with self._lock:
+            self._value = value
+            self._computed_at = time.monotonic()
+            self._computed_at_utc = datetime.utcnow()
+
+    def _background_refresh(self):
+        try:
+            self._refresh()
+        except Exception as e:
+            # Keep serving the previous value; the next stale read retries
+            print(f"{self.name} refresh failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing = False
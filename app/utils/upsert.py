@@ -0,0 +1,28 @@
+from sqlalchemy.dialects import mysql, sqlite
+
+
+def upsert_increment(connection, model, rows, column="value"):
+    """
+    Insert `rows` into `model`'s table, or where a row's primary key already
+    exists add its `column` to the stored value and overwrite its other columns.
+
+    One INSERT ... ON DUPLICATE KEY UPDATE (ON CONFLICT DO UPDATE on SQLite,
+    which the tests run on), so concurrent callers cannot both miss a row
+    and then collide inserting it.
+    """
+    table = model.__table__
+    keys = [key.name for key in table.primary_key]
+    if connection.dialect.name == "mysql":
+        statement = mysql.insert(table).values(rows)
+        inserted = statement.inserted
+    else:
+        statement = sqlite.insert(table).values(rows)
+        inserted = statement.excluded
+
+    updates = {name: inserted[name] for name in rows[0] if name not in keys}
+    updates[column] = table.c[column] + inserted[column]
+    if connection.dialect.name == "mysql":
+        statement = statement.on_duplicate_key_update(updates)
+    else:
+        statement = statement.on_conflict_do_update(index_elements=keys, set_=updates)
+    return connection.execute(statement)
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from config import VERIFICATION_LEASE_SECONDS
+
+
+def _claimable(model, reviewer_id, now):
+    # Unclaimed, lease run out, or already held by this reviewer (claiming again renews it)
+    return or_(
+        model.claimed_by.is_(None),
+        model.lease_expires_at < now,
+        model.claimed_by == reviewer_id,
+    )
+
+
+def claim_next(db: Session, model, schema, reviewer_id: int, limit: int, lease_seconds=VERIFICATION_LEASE_SECONDS):
+    """
+    Lease the oldest `limit` pending items of `model` to `reviewer_id`,
+    returned as `schema` documents.
+
+    The candidates are read from the (status, created_at) index with
+    SKIP LOCKED, so reviewers claiming at the same time get disjoint items
+    instead of waiting on each other's row locks.
+    """
+    now = datetime.utcnow()
+    items = (
+        db.query(model)
+        .filter(model.status == 'pending', _claimable(model, reviewer_id, now))
+        .order_by(model.created_at, model.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    lease_expires_at = now + timedelta(seconds=lease_seconds)
+    for item in items:
+        item.claimed_by = reviewer_id
+        item.lease_expires_at = lease_expires_at
+    db.flush()
+    # Serialized before the commit expires the items; afterwards each would cost a SELECT
+    claimed = [schema.model_validate(item, from_attributes=True) for item in items]
+    db.commit()
+    return claimed
+
+
+def release(db: Session, model, reviewer_id: int, verification_ids):
+    """Hand items back to the queue before their lease runs out."""
+    released = db.query(model).filter(
+        model.id.in_(verification_ids),
+        model.claimed_by == reviewer_id,
+        model.status == 'pending'
+    ).update({"claimed_by": None, "lease_expires_at": None}, synchronize_session=False)
+    db.commit()
+    return released
+
+
+def leased_to_other(item, reviewer_id: int) -> bool:
+    return (
+        item.claimed_by is not None
+        and item.claimed_by != reviewer_id
+        and item.lease_expires_at is not None
+        and item.lease_expires_at > datetime.utcnow()
+    )
@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from config import WEBHOOK_WORKER_ENABLED, WEBHOOK_BATCH_SIZE, WEBHOOK_POLL_SECONDS
+from database import SessionLocal
+from models.webhook_event_model import WebhookEvent
+from models.payment_model import Payment
+from models.penalty_model import Penalty
+from models.refund_model import Refund
+from models.payout_model import Payout
+
+
+class ReconciliationBatch:
+    """Changes collected from a batch of events, written with a few set-based statements."""
+
+    def __init__(self):
+        self.captured = set()       # razorpay payment ids
+        self.failed = set()
+        self.refunds = {}           # refund id -> razorpay refund id
+        self.refunds_by_gateway_id = set()
+        self.payouts = {}           # payout id -> razorpay payout id
+
+    def add(self, event, payload):
+        if event == "payment.captured":
+            self.captured.add(payload["payment"]["entity"]["id"])
+        elif event == "payment.failed":
+            self.failed.add(payload["payment"]["entity"]["id"])
+        elif event == "refund.processed":
+            entity = payload["refund"]["entity"]
+            refund_id = (entity.get("notes") or {}).get("refund_id")
+            if refund_id:
+                self.refunds[int(refund_id)] = entity["id"]
+            else:
+                self.refunds_by_gateway_id.add(entity["id"])
+        elif event == "payout.processed":
+            entity = payload["payout"]["entity"]
+            payout_id = (entity.get("notes") or {}).get("payout_id") or entity.get("reference_id")
+            if payout_id:
+                self.payouts[int(payout_id)] = entity["id"]
+        # Other events are stored but need no reconciliation
+
+    def apply(self, db: Session):
+        if self.captured:
+            db.query(Payment).filter(Payment.razorpay_payment_id.in_(self.captured)).update({"status": "paid"}, synchronize_session=False)
+            db.query(Penalty).filter(Penalty.razorpay_payment_id.in_(self.captured)).update({"payment_status": "paid"}, synchronize_session=False)
+        if self.failed:
+            # A capture always wins over a failure for the same payment
+            db.query(Payment).filter(
+                Payment.razorpay_payment_id.in_(self.failed - self.captured),
+                Payment.status == 'pending'
+            ).update({"status": "failed"}, synchronize_session=False)
+        if self.refunds:
+            existing = {refund_id for (refund_id,) in db.query(Refund.id).filter(Refund.id.in_(self.refunds))}
+            rows = [{"id": refund_id, "status": "claimed", "razorpay_payment_id": gateway_id} for refund_id, gateway_id in self.refunds.items() if refund_id in existing]
+            if rows:
+                db.execute(update(Refund), rows)
+        if self.refunds_by_gateway_id:
+            db.query(Refund).filter(Refund.razorpay_payment_id.in_(self.refunds_by_gateway_id)).update({"status": "claimed"}, synchronize_session=False)
+        if self.payouts:
+            existing = {payout_id for (payout_id,) in db.query(Payout.id).filter(Payout.id.in_(self.payouts))}
+            rows = [{"id": payout_id, "status": "claimed", "razorpay_payment_id": gateway_id} for payout_id, gateway_id in self.payouts.items() if payout_id in existing]
+            if rows:
+                db.execute(update(Payout), rows)
+
+
+def process_batch(db: Session, batch_size=WEBHOOK_BATCH_SIZE):
+    """
+    Claim up to batch_size pending events and apply them in one transaction.
+
+    SKIP LOCKED lets several workers drain the queue without waiting on each
+    other. Malformed events are marked failed without holding up the rest.
+    Returns the number of events taken.
+    """
+    events = (
+        db.query(WebhookEvent)
+        .filter(WebhookEvent.status == 'pending')
+        .order_by(WebhookEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not events:
+        db.rollback()
+        return 0
+
+    now = datetime.utcnow()
+    batch = ReconciliationBatch()
+    for event in events:
+        try:
+            batch.add(event.event, json.loads(event.payload)["payload"])
+            event.status = 'processed'
+        except (ValueError, KeyError, TypeError) as e:
+            event.status = 'failed'
+            event.error = f"{type(e).__name__}: {str(e)}"
+        event.processed_at = now
+
+    batch.apply(db)
+    db.commit()
+    return len(events)
+
+
+_worker_thread = None
+
+
+def _run(interval):
+    while True:
+        db = SessionLocal()
+        try:
+            taken = process_batch(db)
+        except Exception as e:
+            db.rollback()
+            taken = 0
+            print(f"Webhook worker batch failed: {str(e)}")
+        finally:
+            db.close()
+        # Keep draining while the queue is full, otherwise wait for more deliveries
+        if taken < WEBHOOK_BATCH_SIZE:
+            time.sleep(interval)
+
+
+def start_webhook_worker(interval=WEBHOOK_POLL_SECONDS):
+    global _worker_thread
+    if not WEBHOOK_WORKER_ENABLED or _worker_thread is not None:
+        return
+    _worker_thread = threading.Thread(target=_run, args=(interval,), name="webhook-worker", daemon=True)
+    _worker_thread.start()